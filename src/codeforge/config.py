@@ -4,7 +4,7 @@
 This module defines the app settings loaded from env vars with validation.
 """
 
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import Field, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -18,10 +18,30 @@ class Settings(BaseSettings):
         use_sparse: Toggle for sparse embeddings in RAG.
         use_gpu: Toggle for GPU acceleration.
         use_structured: Toggle for structured outputs in routing.
+        use_pipelining: Toggle for pipelined research/debate/implement.
+        use_semantic_cache: Toggle reuse of results for similar queries.
         qdrant_url: URL for Qdrant service.
         neo4j_uri: URI for Neo4j service.
         tavily_api_key: API key for Tavily search.
         openrouter_api_key: API key for OpenRouter.
+        vector_backend: Vector store backend ("qdrant" or "local").
+        vector_store_path: Directory for the local vector store.
+        use_hnsw: Toggle HNSW indexing in the local vector store.
+        graph_hops: Default graph expansion depth for GraphRAG+.
+        graph_refresh_seconds: Interval between incremental adjacency refreshes.
+        graph_full_refresh_seconds: Interval between full adjacency rebuilds.
+        workflow_timeout: End-to-end time budget for one workflow run.
+        stage_timeout: Maximum duration of a single stage attempt.
+        stage_attempts: Maximum attempts per stage.
+        stage_min_budget: Remaining budget below which stages stop retrying.
+        breaker_failure_threshold: Consecutive failures that open a breaker.
+        breaker_reset_seconds: Time an open breaker waits before probing.
+        retrieval_cache_size: Maximum cached retrieval results (0 disables).
+        retrieval_cache_ttl: Seconds a cached retrieval result stays valid.
+        semantic_cache_threshold: Cosine similarity for a semantic cache hit.
+        serve_workers: Worker processes for `codeforge serve` (0: one per core).
+        serve_concurrency: Concurrent workflows per serve worker.
+        serve_metrics_port: Port for serve health and metrics endpoints.
     """
 
     model_config = SettingsConfigDict(
@@ -34,13 +54,72 @@ class Settings(BaseSettings):
     use_structured: bool = Field(
         default=False, description="Toggle structured outputs."
     )
+    use_pipelining: bool = Field(
+        default=False, description="Toggle pipelined stage execution."
+    )
     qdrant_url: str = Field(default="http://localhost:6333", alias="QDRANT_URL")
     neo4j_uri: str = Field(default="bolt://localhost:7687", alias="NEO4J_URI")
     tavily_api_key: Optional[str] = Field(default=None, alias="TAVILY_API_KEY")
     openrouter_api_key: Optional[str] = Field(default=None, alias="OPENROUTER_API_KEY")
+    vector_backend: Literal["qdrant", "local"] = Field(
+        default="qdrant", description="Vector store backend."
+    )
+    vector_store_path: str = Field(
+        default=".codeforge/vectors", description="Local vector store directory."
+    )
+    use_hnsw: bool = Field(default=False, description="Toggle local HNSW index.")
+    graph_hops: int = Field(default=1, ge=0, description="Graph expansion depth.")
+    graph_refresh_seconds: float = Field(
+        default=30.0, gt=0, description="Incremental adjacency refresh interval."
+    )
+    graph_full_refresh_seconds: float = Field(
+        default=600.0, gt=0, description="Full adjacency rebuild interval."
+    )
+    workflow_timeout: float = Field(
+        default=120.0, gt=0, description="End-to-end workflow budget in seconds."
+    )
+    stage_timeout: float = Field(
+        default=30.0, gt=0, description="Per-attempt stage timeout in seconds."
+    )
+    stage_attempts: int = Field(default=3, ge=1, description="Attempts per stage.")
+    stage_min_budget: float = Field(
+        default=0.25, ge=0, description="Budget needed to start a retry."
+    )
+    breaker_failure_threshold: int = Field(
+        default=5, ge=1, description="Failures before a breaker opens."
+    )
+    breaker_reset_seconds: float = Field(
+        default=30.0, gt=0, description="Open breaker cool-down in seconds."
+    )
+    retrieval_cache_size: int = Field(
+        default=1024, ge=0, description="Cached retrieval results."
+    )
+    retrieval_cache_ttl: float = Field(
+        default=300.0, gt=0, description="Retrieval cache TTL in seconds."
+    )
+    use_semantic_cache: bool = Field(
+        default=False, description="Toggle semantic retrieval cache tier."
+    )
+    semantic_cache_threshold: float = Field(
+        default=0.95, gt=0, le=1, description="Semantic cache similarity."
+    )
+    serve_workers: int = Field(default=0, ge=0, description="Serve worker processes.")
+    serve_concurrency: int = Field(
+        default=8, ge=1, description="Concurrent workflows per serve worker."
+    )
+    serve_metrics_port: int = Field(
+        default=9464, ge=0, description="Serve health and metrics port."
+    )
 
     @field_validator(
-        "use_async", "use_sparse", "use_gpu", "use_structured", mode="before"
+        "use_async",
+        "use_sparse",
+        "use_gpu",
+        "use_structured",
+        "use_pipelining",
+        "use_hnsw",
+        "use_semantic_cache",
+        mode="before",
     )
     @classmethod
     def parse_bool(cls, v: str) -> bool:
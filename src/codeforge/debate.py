@@ -4,7 +4,8 @@
 This module implements a multi-agent debate mechanism using LangGraph.
 """
 
-from typing import Any
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
 
 from langgraph.graph import END, StateGraph
 
@@ -12,48 +13,49 @@ from .router import route_model
 from .state import State
 
 
-async def pro_agent(state: State) -> State:
+async def pro_agent(state: State) -> dict[str, Any]:
     """Pro agent argues in favor of the task.
 
     Args:
         state: Current workflow state.
 
     Returns:
-        Updated state with pro argument.
+        State update with pro argument.
     """
     pro: dict[str, Any] = await route_model("Argue pro: " + state["task"], "reasoning")
-    state["messages"].append({"role": "pro", "content": pro["response"]})
-    return state
+    return {"messages": [{"role": "pro", "content": pro["response"]}]}
 
 
-async def con_agent(state: State) -> State:
+async def con_agent(state: State) -> dict[str, Any]:
     """Con agent argues against the task.
 
     Args:
         state: Current workflow state.
 
     Returns:
-        Updated state with con argument.
+        State update with con argument.
     """
     con: dict[str, Any] = await route_model("Argue con: " + state["task"], "reasoning")
-    state["messages"].append({"role": "con", "content": con["response"]})
-    return state
+    return {"messages": [{"role": "con", "content": con["response"]}]}
 
 
-async def moderator_agent(state: State) -> State:
-    """Moderator synthesizes arguments.
+async def moderator_agent(state: State) -> dict[str, Any]:
+    """Moderator synthesizes arguments, grounded in research when available.
 
     Args:
         state: Current workflow state.
 
     Returns:
-        Updated state with moderation.
+        State update with moderation.
     """
-    mod: dict[str, Any] = await route_model(
-        "Moderate: " + " ".join(m["content"] for m in state["messages"]), "reasoning"
-    )
-    state["messages"].append({"role": "moderator", "content": mod["response"]})
-    return state
+    prompt: str = "Moderate: " + " ".join(m["content"] for m in state["messages"])
+    research: list[dict[str, Any]] = state.get("private", {}).get("research") or []
+    if research:
+        prompt += " Context: " + " ".join(
+            str(r.get("content", r)) for r in research[:5] if isinstance(r, dict)
+        )
+    mod: dict[str, Any] = await route_model(prompt, "reasoning")
+    return {"messages": [{"role": "moderator", "content": mod["response"]}]}
 
 
 def vote(state: State) -> bool:
@@ -79,20 +81,36 @@ debate_subgraph.add_edge("pro", "con")
 debate_subgraph.add_edge("con", "moderator")
 debate_subgraph.add_edge("moderator", END)
 
+debate_graph = debate_subgraph.compile()
+
 
-async def run_debate(state: State, rounds: int = 2) -> State:
+async def run_debate(
+    state: State,
+    rounds: int = 2,
+    research: Optional[asyncio.Future[list[dict[str, Any]]]] = None,
+    on_synthesis: Optional[Callable[[State], Awaitable[None]]] = None,
+) -> State:
     """Run the debate subgraph for specified rounds.
 
     Args:
         state: Initial workflow state.
         rounds: Number of debate rounds (default: 2).
+        research: Pending retrieval; its results are handed to the moderator
+            from the first round that starts after it completes.
+        on_synthesis: Callback awaited after each moderated round, once the
+            task has been refined for the next round.
 
     Returns:
         Updated state after debate.
     """
-    graph = debate_subgraph.compile(interrupt_before=["moderator"])
     for _ in range(rounds):
-        state = await graph.ainvoke(state)
+        if research is not None and research.done() and not research.cancelled():
+            if research.exception() is None:
+                state["private"]["research"] = research.result()
+            research = None
+        state = await debate_graph.ainvoke(state)
         if not vote(state):
             state["task"] += " Refine based on debate."
+        if on_synthesis is not None:
+            await on_synthesis(state)
     return state
@@ -0,0 +1,247 @@
+# coding=utf-8
+"""In-process adjacency cache for GraphRAG+ graph expansion.
+
+This module keeps a compressed sparse row (CSR) snapshot of the Neo4j graph so
+multi-hop neighborhood expansion runs locally, with Neo4j used for properties.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Iterable, NamedTuple, Optional
+
+import numpy as np
+from neo4j import AsyncDriver, Driver
+
+from .resilience import Deadline, call_stage
+from .retrieval_cache import bump_index_version
+
+logger = logging.getLogger(__name__)
+
+EDGES_QUERY: str = (
+    "MATCH (a)-[r]->(b) WHERE id(r) > $since "
+    "RETURN id(r) AS rid, elementId(a) AS src, elementId(b) AS dst ORDER BY rid"
+)
+NODES_QUERY: str = (
+    "MATCH (n) WHERE elementId(n) IN $ids RETURN elementId(n) AS node_id, n"
+)
+
+
+async def run_query(
+    driver: AsyncDriver | Driver, cypher: str, **params: Any
+) -> list[dict[str, Any]]:
+    """Run a Cypher query on a sync or async driver and return its records.
+
+    Args:
+        driver: Neo4j driver.
+        cypher: Cypher query string.
+        **params: Query parameters (may include one named "query").
+
+    Returns:
+        List of record dictionaries.
+    """
+    if isinstance(driver, AsyncDriver):
+        async with driver.session() as session:
+            result = await session.run(cypher, params)
+            return await result.data()
+
+    def run_sync() -> list[dict[str, Any]]:
+        with driver.session() as session:
+            return session.run(cypher, params).data()
+
+    return await asyncio.to_thread(run_sync)
+
+
+class AdjacencySnapshot(NamedTuple):
+    """Immutable undirected CSR adjacency of the graph.
+
+    Attributes:
+        indptr: Row offsets into `indices`, length `len(keys) + 1`.
+        indices: Neighbor row numbers.
+        keys: Neo4j element id for each row.
+        index: Element id to row lookup.
+        watermark: Highest relationship id included.
+    """
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    keys: list[str]
+    index: dict[str, int]
+    watermark: int
+
+    @classmethod
+    def empty(cls) -> "AdjacencySnapshot":
+        return cls(np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32), [], {}, -1)
+
+    def with_edges(self, edges: list[dict[str, Any]]) -> "AdjacencySnapshot":
+        """Return a new snapshot with the given relationship records merged in.
+
+        Args:
+            edges: Records with "rid", "src" and "dst" keys.
+
+        Returns:
+            New snapshot; this one is left untouched for concurrent readers.
+        """
+        base = self
+        if not edges:
+            return base
+        keys = list(base.keys)
+        index = dict(base.index)
+        for edge in edges:
+            for key in (edge["src"], edge["dst"]):
+                if key not in index:
+                    index[key] = len(keys)
+                    keys.append(key)
+        src = np.fromiter((index[e["src"]] for e in edges), np.int32, len(edges))
+        dst = np.fromiter((index[e["dst"]] for e in edges), np.int32, len(edges))
+        old_rows = np.repeat(
+            np.arange(len(base.keys), dtype=np.int32), np.diff(base.indptr)
+        )
+        rows = np.concatenate([old_rows, src, dst])
+        cols = np.concatenate([base.indices, dst, src])
+        order = np.argsort(rows, kind="stable")
+        indptr = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(keys)), out=indptr[1:])
+        watermark = max(base.watermark, max(e["rid"] for e in edges))
+        return AdjacencySnapshot(indptr, cols[order], keys, index, watermark)
+
+    def matches(self, other: "AdjacencySnapshot") -> bool:
+        """Return True if `other` yields the same expansions as this snapshot."""
+        return (
+            self is other
+            or self.watermark == other.watermark
+            and self.keys == other.keys
+            and np.array_equal(self.indptr, other.indptr)
+            and np.array_equal(self.indices, other.indices)
+        )
+
+    def expand(
+        self, seeds: Iterable[str], hops: int = 1, max_nodes: int = 50
+    ) -> list[tuple[str, int]]:
+        """Breadth-first expansion from seed nodes.
+
+        Args:
+            seeds: Element ids to start from.
+            hops: Number of hops to expand (default: 1).
+            max_nodes: Cap on returned nodes to bound hub fan-out (default: 50).
+
+        Returns:
+            List of (element id, hop distance) pairs, excluding the seeds.
+        """
+        frontier = np.unique(
+            np.fromiter((self.index[s] for s in seeds if s in self.index), np.int64)
+        )
+        seen = frontier
+        found: list[tuple[str, int]] = []
+        for hop in range(1, hops + 1):
+            if not frontier.size or len(found) >= max_nodes:
+                break
+            starts = self.indptr[frontier]
+            lengths = self.indptr[frontier + 1] - starts
+            total = int(lengths.sum())
+            if not total:
+                break
+            # Vectorized gather of all neighbor slices in the frontier.
+            offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+            neighbors = np.unique(self.indices[offsets + np.arange(total)])
+            frontier = neighbors[~np.isin(neighbors, seen, assume_unique=True)]
+            seen = np.union1d(seen, frontier)
+            found.extend((self.keys[row], hop) for row in frontier)
+        return found[:max_nodes]
+
+
+class GraphCache:
+    """Adjacency snapshot of Neo4j refreshed incrementally in the background.
+
+    New relationships are pulled by internal id watermark on each refresh; a
+    periodic full rebuild drops deleted relationships and reused ids.
+
+    Attributes:
+        snapshot: Current adjacency snapshot (swapped atomically).
+        refresh_seconds: Minimum age before an incremental refresh.
+        full_refresh_seconds: Minimum age before a full rebuild.
+    """
+
+    def __init__(
+        self, refresh_seconds: float = 30.0, full_refresh_seconds: float = 600.0
+    ) -> None:
+        self.snapshot: AdjacencySnapshot = AdjacencySnapshot.empty()
+        self.refresh_seconds = refresh_seconds
+        self.full_refresh_seconds = full_refresh_seconds
+        self._refreshed_at: float = float("-inf")
+        self._rebuilt_at: float = float("-inf")
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def refresh(self, driver: AsyncDriver | Driver, full: bool = False) -> None:
+        """Pull new relationships from Neo4j into a new snapshot.
+
+        Args:
+            driver: Neo4j driver.
+            full: Rebuild from scratch instead of extending (default: False).
+        """
+        async with self._lock:
+            now = time.monotonic()
+            full = full or now - self._rebuilt_at >= self.full_refresh_seconds
+            base = AdjacencySnapshot.empty() if full else self.snapshot
+            edges = await run_query(driver, EDGES_QUERY, since=base.watermark)
+            previous, self.snapshot = self.snapshot, base.with_edges(edges)
+            # A rebuild only catches deletions; skip the bump if nothing changed.
+            if not previous.matches(self.snapshot):
+                bump_index_version()  # Expansions may differ; drop cached results
+            self._refreshed_at = now
+            if full:
+                self._rebuilt_at = now
+
+    async def ensure_fresh(self, driver: AsyncDriver | Driver) -> None:
+        """Build the first snapshot inline, then refresh in the background.
+
+        Background refreshes go through the neo4j circuit breaker and log
+        failures instead of leaving them on an unobserved task.
+
+        Args:
+            driver: Neo4j driver.
+        """
+        if self._refreshed_at == float("-inf"):
+            await self.refresh(driver)
+        elif time.monotonic() - self._refreshed_at >= self.refresh_seconds and (
+            self._task is None or self._task.done()
+        ):
+            self._task = asyncio.create_task(self._refresh_in_background(driver))
+
+    async def _refresh_in_background(self, driver: AsyncDriver | Driver) -> None:
+        # Own budget: the triggering request's deadline must not cut this short.
+        try:
+            await call_stage(
+                "neo4j", self.refresh, driver, deadline=Deadline(self.refresh_seconds)
+            )
+        except Exception as exc:  # The current snapshot keeps serving
+            logger.warning("Background graph refresh failed: %s", exc)
+
+    async def expand(
+        self,
+        driver: AsyncDriver | Driver,
+        seeds: Iterable[str],
+        hops: int = 1,
+        max_nodes: int = 50,
+    ) -> list[dict[str, Any]]:
+        """Expand seeds k hops in the snapshot and fetch node properties.
+
+        Args:
+            driver: Neo4j driver used for the single property lookup.
+            seeds: Element ids of seed nodes.
+            hops: Number of hops to expand (default: 1).
+            max_nodes: Cap on expanded nodes (default: 50).
+
+        Returns:
+            Node records with "node_id", "n" and "hops" keys, nearest first.
+        """
+        await self.ensure_fresh(driver)
+        found = self.snapshot.expand(seeds, hops, max_nodes)
+        if not found:
+            return []
+        distance = dict(found)
+        records = await run_query(driver, NODES_QUERY, ids=list(distance))
+        for record in records:
+            record["hops"] = distance[record["node_id"]]
+        return sorted(records, key=lambda r: r["hops"])
@@ -4,21 +4,26 @@
 This module sets up and runs the primary autonomy workflow using LangGraph.
 """
 
-import os
+import asyncio
+import functools
+import time
+import uuid
 from collections import deque
-from typing import Any
+from typing import Any, Optional
 
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, StateGraph
-from redis import Redis
+from redis.asyncio.client import PubSub
 
 from .config import settings
 from .debate import run_debate
+from .memory import long_term_store, record_round_trips, redis, stats_scope
+from .pipeline import run_pipelined
+from .resilience import Deadline, DeadlineExceeded, call_stage, deadline_scope
 from .router import route_model
 from .state import State, cap_messages
 from .tools import graphrag_plus
 
-redis: Redis = Redis(host=os.getenv("REDIS_HOST", "localhost"), port=6379, dialect=3)
 checkpointer: MemorySaver = MemorySaver()
 
 workflow: StateGraph = StateGraph(State)
@@ -28,6 +33,7 @@ workflow.add_node(
 )
 workflow.add_node("debate", run_debate)
 workflow.add_node("implement", lambda state: route_model(state["task"], "coding"))
+workflow.set_entry_point("assign_task")
 workflow.add_edge("assign_task", "research")
 workflow.add_edge("research", "debate")
 workflow.add_edge("debate", "implement")
@@ -35,42 +41,111 @@ workflow.add_edge("implement", END)
 
 graph = workflow.compile(checkpointer=checkpointer)
 
+# Pipelined variant: research, debate and implement overlap in one node.
+pipelined_workflow: StateGraph = StateGraph(State)
+pipelined_workflow.add_node(
+    "assign_task", lambda state: {"task_queue": deque([state["input"]])}
+)
+pipelined_workflow.add_node("pipeline", run_pipelined)
+pipelined_workflow.set_entry_point("assign_task")
+pipelined_workflow.add_edge("assign_task", "pipeline")
+pipelined_workflow.add_edge("pipeline", END)
+
+pipelined_graph = pipelined_workflow.compile(checkpointer=checkpointer)
+
 
-async def run_autonomy_workflow(input: str) -> dict[str, Any]:
+async def _next_message(sub: PubSub, timeout: float) -> Optional[dict[str, Any]]:
+    """Wait up to `timeout` seconds for a published message, skipping acks."""
+    expires_at = time.monotonic() + timeout
+    while (remaining := expires_at - time.monotonic()) > 0:
+        message = await sub.get_message(
+            ignore_subscribe_messages=True, timeout=remaining
+        )
+        if message:
+            return message
+    return None
+
+
+async def run_autonomy_workflow(
+    input: str, timeout: Optional[float] = None, thread_id: Optional[str] = None
+) -> dict[str, Any]:
     """Run the full autonomy workflow from input.
 
+    A deadline is created here and made current for every node, retrieval
+    stage and model call, so the run as a whole is bounded by `timeout`.
+
     Args:
         input: Initial input query or PRD.
+        timeout: Time budget in seconds (default: settings.workflow_timeout).
+        thread_id: Checkpointer thread for this run (default: a fresh id).
 
     Returns:
         Final workflow result dictionary.
     """
+    deadline = Deadline(timeout or settings.workflow_timeout)
+    with deadline_scope(deadline), stats_scope() as redis_stats:
+        result = await _run_workflow(input, deadline, thread_id or uuid.uuid4().hex)
+    result.setdefault("private", {})["redis"] = redis_stats.as_dict()
+    return result
+
+
+async def _run_workflow(
+    input: str, deadline: Deadline, thread_id: str
+) -> dict[str, Any]:
+    """Run the workflow body with `deadline` already current."""
     state: State = {
         "input": input,
         "task_queue": deque(),
         "messages": [],
         "private": {},
         "long_term": {},
+        "task": input,
     }
-    redis.publish("tasks", input)
-    sub = redis.pubsub()
-    sub.subscribe("tasks")
-    message = sub.get_message(timeout=1)
+    state["long_term"] = await call_stage(
+        "redis", long_term_store.load, deadline=deadline
+    )
+    loaded: dict[str, Any] = dict(state["long_term"])
+
+    async with redis.pubsub() as sub:
+        # Subscribe before publishing so this run sees its own task.
+        await call_stage("redis", sub.subscribe, "tasks", deadline=deadline)
+        await call_stage("redis", redis.publish, "tasks", input, deadline=deadline)
+        message = await call_stage(
+            "redis",
+            _next_message,
+            sub,
+            min(1.0, deadline.remaining()),
+            deadline=deadline,
+            attempts=1,
+        )
+        record_round_trips(3)
     if message:
         state["task_queue"].append(message["data"].decode())  # type: ignore
 
+    active_graph = pipelined_graph if settings.use_pipelining else graph
+    config = {"configurable": {"thread_id": thread_id}}  # Required by checkpointer
     if settings.use_gpu:
         import torch
 
         @torch.compile(mode="reduce-overhead")
         async def compiled_invoke(state: State) -> dict[str, Any]:
-            return await graph.ainvoke(state)
+            return await active_graph.ainvoke(state, config=config)
 
-        result: dict[str, Any] = await compiled_invoke(state)
+        invoke = compiled_invoke
     else:
-        result = await graph.ainvoke(state)
+        invoke = functools.partial(active_graph.ainvoke, config=config)
+
+    try:
+        async with asyncio.timeout(deadline.remaining()):
+            result: dict[str, Any] = await invoke(state)
+    except TimeoutError as exc:
+        raise DeadlineExceeded("Workflow deadline exceeded.") from exc
 
     result = cap_messages(result)
+    changed: dict[str, Any] = {
+        k: v for k, v in result.get("long_term", {}).items() if loaded.get(k) != v
+    }
+    await call_stage("redis", long_term_store.save, changed, deadline=deadline)
     checkpointer.save(result)
     return result
 
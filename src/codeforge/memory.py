@@ -0,0 +1,259 @@
+# coding=utf-8
+"""Shared Redis access and long-term memory for CodeForge AI.
+
+This module owns the async Redis connection pool and a long-term state store
+that serves hot keys from local memory using server-assisted invalidation.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterable, Iterator, Optional
+
+from redis.asyncio import ConnectionPool, Redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
+
+# RESP3 pool shared by every workflow in the process; connections are lazy.
+pool: ConnectionPool = ConnectionPool(
+    host=REDIS_HOST, port=REDIS_PORT, protocol=3, max_connections=64
+)
+redis: Redis = Redis(connection_pool=pool)
+
+
+class RedisStats:
+    """Redis usage counters for one workflow run.
+
+    Attributes:
+        local_hits: Reads served from the client-side cache.
+        local_misses: Reads that had to go to Redis.
+        round_trips: Network round trips issued (a pipeline counts once).
+    """
+
+    def __init__(self) -> None:
+        self.local_hits: int = 0
+        self.local_misses: int = 0
+        self.round_trips: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        reads = self.local_hits + self.local_misses
+        return self.local_hits / reads if reads else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**vars(self), "hit_rate": self.hit_rate}
+
+
+current_stats: ContextVar[Optional[RedisStats]] = ContextVar(
+    "current_redis_stats", default=None
+)
+
+
+@contextmanager
+def stats_scope() -> Iterator[RedisStats]:
+    """Collect Redis counters for the enclosed code and its child tasks.
+
+    Yields:
+        Counters for this scope.
+    """
+    stats = RedisStats()
+    token = current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_stats.reset(token)
+
+
+def record_round_trips(count: int = 1) -> None:
+    """Count network round trips against the current workflow, if any."""
+    stats = current_stats.get()
+    if stats is not None:
+        stats.round_trips += count
+
+
+def _record_reads(hits: int, misses: int) -> None:
+    stats = current_stats.get()
+    if stats is not None:
+        stats.local_hits += hits
+        stats.local_misses += misses
+
+
+class LongTermStore:
+    """Redis-backed long-term state with RESP3 client-side caching.
+
+    A dedicated RESP3 connection enables broadcast key tracking for the store
+    prefix and receives invalidation pushes on that same connection. Cached
+    values are dropped as soon as any client changes their key, so reads of
+    hot keys never leave the process. While the invalidation link is down,
+    the cache is bypassed and the link is re-established with backoff.
+
+    Attributes:
+        prefix: Key prefix for stored entries.
+        max_entries: Upper bound on locally cached keys.
+    """
+
+    def __init__(
+        self,
+        client: Redis = redis,
+        prefix: str = "cf:lt:",
+        max_entries: int = 10_000,
+    ) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.max_entries = max_entries
+        self.index_key = f"{prefix}__keys__"
+        self._cache: OrderedDict[str, Optional[bytes]] = OrderedDict()
+        self._epoch: int = 0
+        self._tracking: bool = False
+        self._listener: Optional[asyncio.Task[None]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        """Start invalidation tracking in the running loop if not active."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._listener and not self._listener.done():
+            return
+        self._loop = loop
+        self._invalidate_all()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        source = self.client.connection_pool
+        delay = 0.1
+        while True:
+            tracker = None
+            try:
+                # Pool settings (RESP3); invalidations arrive as push messages.
+                tracker = source.connection_class(**source.connection_kwargs)
+                await tracker.connect()
+                await tracker.send_command(
+                    "CLIENT", "TRACKING", "ON", "BCAST", "PREFIX", self.prefix
+                )
+                await tracker.read_response()
+                self._tracking = True
+                delay = 0.1
+                while True:
+                    message = await tracker.read_response(
+                        timeout=None, push_request=True
+                    )
+                    if isinstance(message, list) and message[0] in (
+                        b"invalidate",
+                        "invalidate",
+                    ):
+                        self._on_invalidate(message[1])
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Redis invalidation link lost: %s", exc)
+            finally:
+                self._tracking = False
+                self._invalidate_all()
+                if tracker is not None:
+                    await tracker.disconnect()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 5.0)
+
+    def _on_invalidate(self, keys: Optional[list[bytes]]) -> None:
+        """Apply an invalidation message; None means the server flushed."""
+        if keys is None:
+            self._invalidate_all()
+            return
+        self._epoch += 1
+        for key in keys:
+            self._cache.pop(key.decode() if isinstance(key, bytes) else key, None)
+
+    def _invalidate_all(self) -> None:
+        self._epoch += 1
+        self._cache.clear()
+
+    def _remember(self, key: str, value: Optional[bytes], epoch: int) -> None:
+        # Skip values read before an invalidation that raced the reply.
+        if not self._tracking or epoch != self._epoch:
+            return
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def _read(self, keys: list[str]) -> dict[str, Optional[bytes]]:
+        """Read raw values, serving cached keys locally and MGET-ing the rest."""
+        await self.start()
+        found: dict[str, Optional[bytes]] = {}
+        missing: list[str] = []
+        for key in keys:
+            if self._tracking and key in self._cache:
+                found[key] = self._cache[key]
+            else:
+                missing.append(key)
+        _record_reads(len(found), len(missing))
+        if missing:
+            epoch = self._epoch
+            values = await self.client.mget(missing)
+            record_round_trips()
+            for key, value in zip(missing, values):
+                found[key] = value
+                self._remember(key, value, epoch)
+        return found
+
+    async def get_many(self, names: Iterable[str]) -> dict[str, Any]:
+        """Return stored values for the given names, skipping absent ones.
+
+        Args:
+            names: Long-term state keys (without prefix).
+
+        Returns:
+            Mapping of name to decoded value.
+        """
+        names = list(names)
+        if not names:
+            return {}
+        raw = await self._read([self.prefix + name for name in names])
+        return {
+            name: json.loads(raw[self.prefix + name])
+            for name in names
+            if raw[self.prefix + name] is not None
+        }
+
+    async def get(self, name: str, default: Any = None) -> Any:
+        return (await self.get_many([name])).get(name, default)
+
+    async def load(self) -> dict[str, Any]:
+        """Return the whole long-term state in at most two round trips."""
+        await self.start()
+        epoch = self._epoch
+        if self._tracking and self.index_key in self._cache:
+            _record_reads(1, 0)
+            members = json.loads(self._cache[self.index_key] or b"[]")
+        else:
+            _record_reads(0, 1)
+            members = sorted(
+                m.decode() for m in await self.client.smembers(self.index_key)
+            )
+            record_round_trips()
+            self._remember(self.index_key, json.dumps(members).encode(), epoch)
+        return await self.get_many(members)
+
+    async def save(self, values: dict[str, Any]) -> None:
+        """Write changed entries in a single pipelined round trip.
+
+        Args:
+            values: Mapping of name to JSON-serializable value.
+        """
+        if not values:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for name, value in values.items():
+                pipe.set(self.prefix + name, json.dumps(value))
+            pipe.sadd(self.index_key, *values)
+            await pipe.execute()
+        record_round_trips()
+
+
+long_term_store: LongTermStore = LongTermStore()
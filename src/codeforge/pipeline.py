@@ -0,0 +1,144 @@
+# coding=utf-8
+"""Pipelined execution of the research, debate and implement stages.
+
+This module overlaps the strict chain: debate starts while retrieval is still
+running, and implementation is launched speculatively from the first moderator
+synthesis, then kept or cancelled once the debate settles.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Optional
+
+from .debate import run_debate
+from .router import route_model
+from .state import State
+from .tools import graphrag_plus
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineStats:
+    """Speculation bookkeeping for one pipelined run.
+
+    Attributes:
+        speculated: Whether an implement call was launched speculatively.
+        kept: Whether the speculative result was used.
+        saved_seconds: Wall-clock time saved versus running implement after
+            the debate.
+        wasted_tokens: Tokens spent on discarded speculative calls; calls
+            cancelled in flight are estimated from their prompt length.
+        cancelled_inflight: Speculative calls cancelled before completing.
+    """
+
+    def __init__(self) -> None:
+        self.speculated: bool = False
+        self.kept: bool = False
+        self.saved_seconds: float = 0.0
+        self.wasted_tokens: int = 0
+        self.cancelled_inflight: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return dict(vars(self))
+
+
+def _estimate_prompt_tokens(prompt: str) -> int:
+    # Rough 4-characters-per-token estimate for calls we never saw usage for.
+    return max(1, len(prompt) // 4)
+
+
+async def run_pipelined(state: State, rounds: int = 2) -> dict[str, Any]:
+    """Run research, debate and implement with overlap and speculation.
+
+    Args:
+        state: Workflow state with the task at the head of `task_queue`.
+        rounds: Number of debate rounds (default: 2).
+
+    Returns:
+        State update with debate messages, research, response and stats.
+    """
+    task: str = state["task_queue"].popleft() if state["task_queue"] else state["input"]
+    stats = PipelineStats()
+    research: asyncio.Task[list[dict[str, Any]]] = asyncio.create_task(
+        graphrag_plus(task)
+    )
+    speculation: Optional[asyncio.Task[tuple[dict[str, Any], float]]] = None
+    speculated_task: str = ""
+    speculated_at: float = 0.0
+
+    async def speculate(prompt: str) -> tuple[dict[str, Any], float]:
+        result = await route_model(prompt, "coding")
+        return result, time.monotonic()
+
+    async def on_synthesis(debate_state: State) -> None:
+        nonlocal speculation, speculated_task, speculated_at
+        if speculation is None:
+            speculated_task = debate_state["task"]  # type: ignore[typeddict-item]
+            speculated_at = time.monotonic()
+            speculation = asyncio.create_task(speculate(speculated_task))
+            stats.speculated = True
+
+    debate_state: State = {  # type: ignore[typeddict-unknown-key]
+        **state,
+        "task": task,
+        "private": dict(state["private"]),
+    }
+    try:
+        debated = await run_debate(
+            debate_state, rounds=rounds, research=research, on_synthesis=on_synthesis
+        )
+        debate_done = time.monotonic()
+        final_task: str = debated["task"]  # type: ignore[typeddict-item]
+
+        implemented: Optional[dict[str, Any]] = None
+        if speculation is not None and final_task == speculated_task:
+            try:
+                implemented, finished_at = await speculation
+            except Exception as exc:  # Fall back to a fresh implement call
+                logger.warning("Speculative implement failed: %s", exc)
+            else:
+                stats.kept = True
+                # Sequential would have started at debate_done and run just as long.
+                stats.saved_seconds = min(
+                    finished_at - speculated_at, debate_done - speculated_at
+                )
+        elif speculation is not None:
+            if speculation.done():
+                if speculation.exception() is None:
+                    stats.wasted_tokens += speculation.result()[0].get("tokens", 0)
+            else:
+                speculation.cancel()
+                stats.cancelled_inflight += 1
+                stats.wasted_tokens += _estimate_prompt_tokens(speculated_task)
+        if implemented is None:
+            implemented = await route_model(final_task, "coding")
+
+        try:
+            retrieved = await research
+        except Exception as exc:  # Retrieval only enriches the debate context
+            logger.warning("Pipelined research failed: %s", exc)
+            retrieved = []
+
+        logger.info("Pipeline speculation stats: %s", stats.as_dict())
+        private = {
+            **debated["private"],
+            "research": retrieved,
+            "pipeline": stats.as_dict(),
+        }
+        return {
+            **implemented,
+            "task": final_task,
+            "messages": debated["messages"],
+            "private": private,
+        }
+    finally:
+        # On error or cancellation (e.g. the workflow deadline), stop work that
+        # would otherwise keep hitting Tavily/Neo4j/OpenRouter unobserved.
+        for pending in (research, speculation):
+            if pending is None:
+                continue
+            if not pending.done():
+                pending.cancel()
+            elif not pending.cancelled():
+                pending.exception()  # Mark a failure as retrieved
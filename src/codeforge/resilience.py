@@ -0,0 +1,262 @@
+# coding=utf-8
+"""Deadlines, circuit breakers and stage-level retries for CodeForge AI.
+
+This module bounds workflow latency end to end: a deadline created per workflow
+flows through every stage, and each external dependency sits behind a breaker.
+"""
+
+import asyncio
+import inspect
+import logging
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_any,
+    wait_random_exponential,
+)
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+DEPENDENCIES: tuple[str, ...] = ("qdrant", "neo4j", "tavily", "openrouter", "redis")
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a workflow's time budget is spent."""
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a dependency's circuit breaker rejects a call."""
+
+
+class Deadline:
+    """Absolute time budget for a workflow, measured on the monotonic clock.
+
+    Attributes:
+        expires_at: Monotonic timestamp at which the budget runs out.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        self.expires_at: float = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """Return seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def check(self, stage: str = "workflow") -> None:
+        """Raise DeadlineExceeded if the budget is spent.
+
+        Args:
+            stage: Stage name for the error message.
+        """
+        if self.expired:
+            raise DeadlineExceeded(f"Deadline exceeded before stage '{stage}'.")
+
+
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar(
+    "current_deadline", default=None
+)
+
+
+def get_deadline(deadline: Optional[Deadline] = None) -> Deadline:
+    """Resolve the deadline for a call.
+
+    Args:
+        deadline: Explicit deadline, if any.
+
+    Returns:
+        The explicit deadline, else the one in context, else an unbounded one.
+    """
+    return deadline or current_deadline.get() or Deadline(math.inf)
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline) -> Iterator[Deadline]:
+    """Make a deadline current for the enclosed code and its child tasks.
+
+    Args:
+        deadline: Deadline to install.
+
+    Yields:
+        The installed deadline.
+    """
+    token = current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        current_deadline.reset(token)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe.
+
+    Attributes:
+        name: Dependency name.
+        failure_threshold: Consecutive failures that open the circuit.
+        reset_timeout: Seconds the circuit stays open before a probe.
+    """
+
+    def __init__(
+        self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures: int = 0
+        self.opened_at: Optional[float] = None
+        self._probing: bool = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        """Admit or reject a call; raises CircuitOpenError when rejected."""
+        state = self.state
+        if state == "open" or (state == "half_open" and self._probing):
+            raise CircuitOpenError(f"Circuit for '{self.name}' is open.")
+        if state == "half_open":
+            self._probing = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def release_probe(self) -> None:
+        """Let another call probe after this one was cancelled mid-flight."""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._probing:
+                logger.warning("Opening circuit for %s", self.name)
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+
+breakers: dict[str, CircuitBreaker] = {
+    name: CircuitBreaker(
+        name, settings.breaker_failure_threshold, settings.breaker_reset_seconds
+    )
+    for name in DEPENDENCIES
+}
+
+
+_backoff = wait_random_exponential(multiplier=0.05, max=1.0)
+
+
+def _is_coroutine_function(fn: Callable[..., Any]) -> bool:
+    # SDK methods are often sync-looking wrappers around an async def.
+    return inspect.iscoroutinefunction(fn) or inspect.iscoroutinefunction(
+        getattr(fn, "__wrapped__", None)
+    )
+
+
+def _retryable(exc: BaseException) -> bool:
+    return not isinstance(exc, (CircuitOpenError, DeadlineExceeded))
+
+
+async def call_stage(
+    dependency: Optional[str],
+    fn: Callable[..., Any],
+    *args: Any,
+    deadline: Optional[Deadline] = None,
+    attempts: Optional[int] = None,
+    stage_timeout: Optional[float] = None,
+    **kwargs: Any,
+) -> Any:
+    """Run one pipeline stage under the deadline, breaker and retry policy.
+
+    Coroutine functions are awaited; plain callables run in a worker thread so
+    a blocking client cannot hold the event loop past the deadline. Retries
+    only repeat this stage and stop once the remaining budget is too small.
+
+    Args:
+        dependency: Breaker name, or None for local stages.
+        fn: Callable performing the stage.
+        *args: Positional arguments for `fn`.
+        deadline: Deadline to honor (default: current context deadline).
+        attempts: Maximum attempts (default: settings.stage_attempts).
+        stage_timeout: Per-attempt timeout (default: settings.stage_timeout).
+        **kwargs: Keyword arguments for `fn`.
+
+    Returns:
+        The stage result.
+    """
+    deadline = get_deadline(deadline)
+    breaker = breakers.get(dependency) if dependency else None
+    stage_timeout = stage_timeout or settings.stage_timeout
+    name = dependency or getattr(fn, "__name__", "stage")
+
+    def out_of_budget(retry_state: RetryCallState) -> bool:
+        return deadline.remaining() < settings.stage_min_budget
+
+    def wait(retry_state: RetryCallState) -> float:
+        return min(_backoff(retry_state), deadline.remaining())
+
+    retrying = AsyncRetrying(
+        stop=stop_any(
+            stop_after_attempt(attempts or settings.stage_attempts), out_of_budget
+        ),
+        wait=wait,
+        retry=retry_if_exception(_retryable),
+        reraise=True,
+    )
+    async for attempt in retrying:
+        with attempt:
+            deadline.check(name)
+            if breaker:
+                breaker.before_call()
+            budget = deadline.remaining()
+            try:
+                async with asyncio.timeout(min(stage_timeout, budget)):
+                    result = await (
+                        fn(*args, **kwargs)
+                        if _is_coroutine_function(fn)
+                        else asyncio.to_thread(fn, *args, **kwargs)
+                    )
+                    if inspect.isawaitable(result):
+                        result = await result
+            except asyncio.CancelledError:
+                if breaker:
+                    breaker.release_probe()
+                raise
+            except DeadlineExceeded:
+                raise
+            except TimeoutError as exc:
+                if budget < stage_timeout or deadline.expired:
+                    # The workflow ran out of time; the dependency is not at fault.
+                    if breaker:
+                        breaker.release_probe()
+                    raise DeadlineExceeded(
+                        f"Deadline exceeded during stage '{name}'."
+                    ) from exc
+                if breaker:
+                    breaker.record_failure()
+                raise
+            except Exception:
+                if breaker:
+                    breaker.record_failure()
+                raise
+            if breaker:
+                breaker.record_success()
+    return result
@@ -0,0 +1,233 @@
+# coding=utf-8
+"""Versioned retrieval result cache for GraphRAG+.
+
+This module caches fused retrieval results by normalized query, with an
+optional semantic tier for near-identical queries, and drops every entry
+older than the latest index write.
+"""
+
+import ctypes
+import multiprocessing
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional
+
+import numpy as np
+
+# Shared with processes forked after import (e.g. `codeforge serve` workers).
+_index_version = multiprocessing.Value(ctypes.c_int64, 0)
+
+
+def index_version() -> int:
+    """Return the current retrieval index version."""
+    return _index_version.value
+
+
+def bump_index_version() -> int:
+    """Invalidate cached retrieval results after an index write.
+
+    Call after a vector upsert, graph ingest or graph refresh completes.
+
+    Returns:
+        The new index version.
+    """
+    with _index_version.get_lock():
+        _index_version.value += 1
+        return _index_version.value
+
+
+def normalize_query(query: str) -> str:
+    """Fold case and collapse whitespace so trivial variants share an entry."""
+    return " ".join(query.casefold().split())
+
+
+class CacheStats:
+    """Retrieval cache counters.
+
+    Attributes:
+        exact_hits: Lookups served by the normalized-query tier.
+        semantic_hits: Lookups served by the embedding-similarity tier.
+        misses: Lookups that ran the full retrieval.
+        stale: Entries dropped because the index changed.
+        expired: Entries dropped by TTL.
+        evictions: Entries dropped to respect the size bound.
+    """
+
+    def __init__(self) -> None:
+        self.exact_hits: int = 0
+        self.semantic_hits: int = 0
+        self.misses: int = 0
+        self.stale: int = 0
+        self.expired: int = 0
+        self.evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**vars(self), "hit_rate": self.hit_rate}
+
+
+class _Entry(NamedTuple):
+    results: list[dict[str, Any]]
+    version: int
+    expires_at: float
+    vector: Optional[np.ndarray]
+
+
+class RetrievalCache:
+    """LRU/TTL cache of retrieval results tied to the index version.
+
+    Keys are (normalized query, scope) pairs, where scope holds the options
+    that change results, such as content type and hop count. The semantic
+    tier compares unit-normalized query embeddings within the same scope and
+    reuses the closest entry at or above `semantic_threshold`. Entries
+    created before the latest `bump_index_version` are never returned.
+
+    Attributes:
+        max_entries: Upper bound on cached queries.
+        ttl: Seconds an entry stays valid.
+        semantic_threshold: Minimum cosine similarity for a semantic hit, or
+            None to disable the tier.
+        stats: Hit, miss and eviction counters.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 300.0,
+        semantic_threshold: Optional[float] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.semantic_threshold = semantic_threshold
+        self.stats = CacheStats()
+        self._entries: OrderedDict[tuple[str, Hashable], _Entry] = OrderedDict()
+        # Stacked unit vectors per scope, rebuilt lazily after changes.
+        self._matrices: dict[Hashable, tuple[list[str], np.ndarray]] = {}
+
+    def _drop(self, key: tuple[str, Hashable]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry.vector is not None:
+            self._matrices.pop(key[1], None)
+
+    def _valid(self, key: tuple[str, Hashable], entry: _Entry, now: float) -> bool:
+        if entry.version != index_version():
+            self.stats.stale += 1
+        elif entry.expires_at <= now:
+            self.stats.expired += 1
+        else:
+            return True
+        self._drop(key)
+        return False
+
+    def get(self, query: str, scope: Hashable) -> Optional[list[dict[str, Any]]]:
+        """Return results for an equivalent query, if cached and current.
+
+        Args:
+            query: Raw query string.
+            scope: Hashable options the results depend on.
+
+        Returns:
+            Copy of the cached results, or None.
+        """
+        key = (normalize_query(query), scope)
+        entry = self._entries.get(key)
+        if entry is not None and self._valid(key, entry, time.monotonic()):
+            self._entries.move_to_end(key)
+            self.stats.exact_hits += 1
+            return list(entry.results)
+        return None
+
+    def get_similar(
+        self, vector: list[float] | np.ndarray, scope: Hashable
+    ) -> Optional[list[dict[str, Any]]]:
+        """Return results for the most similar cached query above threshold.
+
+        Args:
+            vector: Query embedding.
+            scope: Hashable options the results depend on.
+
+        Returns:
+            Copy of the cached results, or None (counted as a miss).
+        """
+        if self.semantic_threshold is not None:
+            unit = _unit(vector)
+            found = self._matrices.get(scope)
+            if found is None:
+                queries = [
+                    q
+                    for (q, s), e in self._entries.items()
+                    if s == scope and e.vector is not None
+                ]
+                if queries:
+                    matrix = np.stack(
+                        [self._entries[(q, scope)].vector for q in queries]
+                    )
+                    found = self._matrices[scope] = (queries, matrix)
+            if found is not None and found[1].shape[1] == unit.shape[0]:
+                queries, matrix = found
+                scores = matrix @ unit
+                now = time.monotonic()
+                for row in np.argsort(-scores):
+                    if scores[row] < self.semantic_threshold:
+                        break
+                    key = (queries[row], scope)
+                    entry = self._entries.get(key)
+                    if entry is not None and self._valid(key, entry, now):
+                        self._entries.move_to_end(key)
+                        self.stats.semantic_hits += 1
+                        return list(entry.results)
+        self.stats.misses += 1
+        return None
+
+    def put(
+        self,
+        query: str,
+        scope: Hashable,
+        results: list[dict[str, Any]],
+        version: int,
+        vector: Optional[list[float] | np.ndarray] = None,
+    ) -> None:
+        """Cache results computed against index `version`.
+
+        Pass the version read before retrieval started: if the index changed
+        meanwhile, the entry is already stale and is not stored.
+
+        Args:
+            query: Raw query string.
+            scope: Hashable options the results depend on.
+            results: Fused retrieval results.
+            version: Index version observed before retrieval.
+            vector: Query embedding for the semantic tier.
+        """
+        if self.max_entries <= 0 or version != index_version():
+            return
+        key = (normalize_query(query), scope)
+        self._drop(key)
+        unit = (
+            _unit(vector)
+            if vector is not None and self.semantic_threshold is not None
+            else None
+        )
+        self._entries[key] = _Entry(
+            list(results), version, time.monotonic() + self.ttl, unit
+        )
+        if unit is not None:
+            self._matrices.pop(scope, None)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._matrices.clear()
+
+
+def _unit(vector: list[float] | np.ndarray) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array))
+    return array / norm if norm else array
@@ -4,28 +4,33 @@
 This module handles dynamic model selection and invocation via OpenRouter.
 """
 
-from typing import Any
+from typing import Any, Optional
 
 from openai import AsyncOpenAI
-from tenacity import retry, stop_after_attempt, wait_fixed
 
 from .config import settings
+from .resilience import Deadline, call_stage
 
+# Retries are handled per call by call_stage within the workflow deadline.
 openrouter: AsyncOpenAI = AsyncOpenAI(
-    base_url="https://openrouter.ai/api/v1", api_key=settings.openrouter_api_key
+    base_url="https://openrouter.ai/api/v1",
+    api_key=settings.openrouter_api_key,
+    max_retries=0,
 )
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
-async def route_model(task: str, category: str) -> dict[str, Any]:
+async def route_model(
+    task: str, category: str, deadline: Optional[Deadline] = None
+) -> dict[str, Any]:
     """Route task to appropriate model based on complexity and category.
 
     Args:
         task: Task description string.
         category: Task category (e.g., "reasoning", "coding").
+        deadline: Time budget (default: the workflow deadline in context).
 
     Returns:
-        Dictionary with selected model and response.
+        Dictionary with selected model, response and total tokens used.
     """
     if "complex" in task or category == "reasoning":
         model: str = "xai/grok-4"
@@ -51,10 +56,18 @@ async def route_model(task: str, category: str) -> dict[str, Any]:
         else None
     )
 
-    response = await openrouter.chat.completions.create(
+    response = await call_stage(
+        "openrouter",
+        openrouter.chat.completions.create,
+        deadline=deadline,
         model=model,
         messages=[{"role": "user", "content": task}],
         max_tokens=500,
         response_format=response_format,
     )
-    return {"model": model, "response": response.choices[0].message.content}
+    usage = getattr(response, "usage", None)
+    return {
+        "model": model,
+        "response": response.choices[0].message.content,
+        "tokens": usage.total_tokens if usage else 0,
+    }
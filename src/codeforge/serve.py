@@ -0,0 +1,430 @@
+# coding=utf-8
+"""Multi-core serving runtime for CodeForge AI.
+
+This module implements `codeforge serve`: a pre-fork server that loads models
+once in the parent and runs one event loop per worker process, each pulling
+workflows from a shared Redis queue. A worker moves each job to its slot's
+processing list until the result is published, so jobs held by a worker that
+dies are put back on the queue instead of being lost.
+"""
+
+import asyncio
+import ctypes
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY: str = "cf:workflows"
+PROCESSING_KEY: str = "cf:workflows:processing:{}"  # Per worker slot
+RESULT_KEY: str = "cf:results:{}"
+RESULT_TTL: int = 3600
+
+# Per-worker counters live in one shared array inherited across fork.
+PID, STARTED, HEARTBEAT, DONE, FAILED, BUSY, LATENCY = range(7)
+FIELDS: int = 7
+
+
+def preload_models() -> None:
+    """Load models and clients in the parent so workers share them.
+
+    Model weights are moved to shared memory where supported, and the heap is
+    frozen so the cyclic GC in workers does not dirty copy-on-write pages.
+    No inference runs here: thread pools started before fork are not safe to
+    use in the children.
+    """
+    from . import main, tools  # noqa: F401  # Loads embedders and compiles graphs
+
+    for model in (tools.embedder, tools.sparse_embedder):
+        if model is not None and hasattr(model, "share_memory"):
+            model.share_memory()
+    gc.collect()
+    gc.freeze()
+
+
+async def submit_workflow(
+    input: str, timeout: float = 300.0
+) -> Optional[dict[str, Any]]:
+    """Enqueue a workflow for `codeforge serve` and wait for its result.
+
+    Args:
+        input: Initial input query or PRD.
+        timeout: Seconds to wait for a result (default: 300).
+
+    Returns:
+        Result dictionary, or None if no worker answered in time.
+    """
+    from .memory import redis
+
+    job_id = uuid.uuid4().hex
+    await redis.rpush(QUEUE_KEY, json.dumps({"id": job_id, "input": input}))
+    reply = await redis.blpop([RESULT_KEY.format(job_id)], timeout=timeout)
+    return json.loads(reply[1]) if reply else None
+
+
+class WorkerRuntime:
+    """Event loop of a single worker process.
+
+    Attributes:
+        slot: Index of this worker's counters in the shared array.
+        concurrency: Maximum workflows run concurrently in this worker.
+        max_jobs: Jobs after which the worker exits to be replaced (0: never).
+    """
+
+    def __init__(self, stats: Any, slot: int, concurrency: int, max_jobs: int) -> None:
+        self.stats = stats
+        self.slot = slot
+        self.concurrency = concurrency
+        self.max_jobs = max_jobs
+
+    def _set(self, field: int, value: float) -> None:
+        self.stats[self.slot * FIELDS + field] = value
+
+    def _add(self, field: int, value: float) -> None:
+        self.stats[self.slot * FIELDS + field] += value
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._set(HEARTBEAT, time.time())
+            await asyncio.sleep(1.0)
+
+    async def _run_job(self, raw: bytes) -> None:
+        from .main import run_autonomy_workflow
+        from .memory import redis
+
+        job = json.loads(raw)
+        started = time.monotonic()
+        self._add(BUSY, 1)
+        try:
+            result = await run_autonomy_workflow(job["input"], thread_id=job["id"])
+            reply = {"ok": True, "result": result}
+        except Exception as exc:
+            logger.exception("Workflow %s failed", job.get("id"))
+            self._add(FAILED, 1)
+            reply = {"ok": False, "error": repr(exc)}
+        finally:
+            self._add(BUSY, -1)
+            self._add(DONE, 1)
+            self._add(LATENCY, time.monotonic() - started)
+        key = RESULT_KEY.format(job["id"])
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, json.dumps(reply, default=str))
+            pipe.expire(key, RESULT_TTL)
+            pipe.lrem(PROCESSING_KEY.format(self.slot), 1, raw)
+            await pipe.execute()
+
+    async def run(self) -> None:
+        """Pull and run workflows until SIGTERM, then drain in-flight work."""
+        from .memory import redis
+
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, stopping.set)
+        heartbeat = asyncio.create_task(self._heartbeat())
+        slots = asyncio.Semaphore(self.concurrency)
+        running: set[asyncio.Task[None]] = set()
+        taken = 0
+        while not stopping.is_set() and not (self.max_jobs and taken >= self.max_jobs):
+            await slots.acquire()
+            try:
+                item = await redis.blmove(
+                    QUEUE_KEY, PROCESSING_KEY.format(self.slot), 1, "LEFT", "RIGHT"
+                )
+            except Exception as exc:
+                logger.warning("Queue read failed: %s", exc)
+                item = None
+                await asyncio.sleep(1.0)
+            if item is None:
+                slots.release()
+                continue
+            taken += 1
+            task = asyncio.create_task(self._run_job(item))
+            running.add(task)
+            task.add_done_callback(running.discard)
+            task.add_done_callback(lambda _: slots.release())
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+        heartbeat.cancel()
+
+
+class PreforkServer:
+    """Parent process that forks, supervises and restarts workers.
+
+    SIGHUP replaces workers one at a time, each draining its in-flight
+    workflows first; SIGTERM/SIGINT drain and stop all workers. Workers whose
+    heartbeat stalls are killed and replaced. Health and per-worker metrics
+    are served as JSON on `/health` and `/metrics`.
+
+    Attributes:
+        workers: Number of worker processes.
+        concurrency: Concurrent workflows per worker.
+        max_jobs: Jobs per worker before recycling (0: never).
+        heartbeat_timeout: Seconds without heartbeat before a worker is killed.
+        graceful_timeout: Seconds to wait for draining workers on shutdown.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        concurrency: int = 8,
+        metrics_host: str = "127.0.0.1",
+        metrics_port: int = 9464,
+        max_jobs: int = 0,
+        heartbeat_timeout: float = 30.0,
+        graceful_timeout: float = 60.0,
+    ) -> None:
+        self.workers = workers
+        self.concurrency = concurrency
+        self.metrics_address = (metrics_host, metrics_port)
+        self.max_jobs = max_jobs
+        self.heartbeat_timeout = heartbeat_timeout
+        self.graceful_timeout = graceful_timeout
+        self.stats: Any = multiprocessing.RawArray(ctypes.c_double, workers * FIELDS)
+        self.pids: dict[int, int] = {}  # pid -> slot
+        self._stopping = False
+        self._restart_slots: list[int] = []
+        self._restarting: Optional[int] = None
+
+    def _field(self, slot: int, field: int) -> float:
+        return self.stats[slot * FIELDS + field]
+
+    def spawn(self, slot: int) -> None:
+        """Fork a worker into `slot`."""
+        base = slot * FIELDS
+        for field in range(FIELDS):
+            self.stats[base + field] = 0.0
+        # Stamp the heartbeat before forking so the supervisor never sees a
+        # fresh worker as stalled before its loop starts.
+        self.stats[base + STARTED] = self.stats[base + HEARTBEAT] = time.time()
+        pid = os.fork()
+        if pid:
+            self.stats[base + PID] = pid
+            self.pids[pid] = slot
+            return
+        code = 0
+        try:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)  # Parent coordinates
+            signal.signal(signal.SIGHUP, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            if "torch" in sys.modules:
+                cores = os.cpu_count() or 1
+                sys.modules["torch"].set_num_threads(max(1, cores // self.workers))
+            runtime = WorkerRuntime(self.stats, slot, self.concurrency, self.max_jobs)
+            asyncio.run(runtime.run())
+        except BaseException:
+            logger.exception("Worker %d crashed", slot)
+            code = 1
+        finally:
+            os._exit(code)
+
+    def worker_metrics(self) -> list[dict[str, Any]]:
+        """Return health and counters for every worker slot."""
+        now = time.time()
+        metrics: list[dict[str, Any]] = []
+        for slot in range(self.workers):
+            pid = int(self._field(slot, PID))
+            done = self._field(slot, DONE)
+            heartbeat_age = now - self._field(slot, HEARTBEAT)
+            metrics.append(
+                {
+                    "slot": slot,
+                    "pid": pid,
+                    "alive": pid in self.pids,
+                    "healthy": pid in self.pids
+                    and heartbeat_age < self.heartbeat_timeout,
+                    "uptime_seconds": now - self._field(slot, STARTED),
+                    "heartbeat_age_seconds": heartbeat_age,
+                    "jobs_done": int(done),
+                    "jobs_failed": int(self._field(slot, FAILED)),
+                    "busy": int(self._field(slot, BUSY)),
+                    "mean_latency_seconds": self._field(slot, LATENCY) / done
+                    if done
+                    else 0.0,
+                    "rss_bytes": _rss_bytes(pid),
+                }
+            )
+        return metrics
+
+    def _metrics_server(self) -> HTTPServer:
+        server_ref = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Requests run on the supervisor loop: never wait long on a client.
+            timeout = 0.5
+
+            def do_GET(self) -> None:  # noqa: N802
+                workers = server_ref.worker_metrics()
+                healthy = all(w["healthy"] for w in workers)
+                if self.path == "/health":
+                    status, body = (200 if healthy else 503), {"healthy": healthy}
+                elif self.path == "/metrics":
+                    status, body = 200, {"healthy": healthy, "workers": workers}
+                else:
+                    status, body = 404, {"error": "not found"}
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug(format, *args)
+
+        server = HTTPServer(self.metrics_address, Handler)
+        server.timeout = 0.5  # handle_request() doubles as the supervisor tick
+        return server
+
+    def _on_signal(self, signum: int, frame: Any) -> None:
+        if signum == signal.SIGHUP:
+            logger.info("Rolling restart of %d workers", self.workers)
+            self._restart_slots = list(range(self.workers))
+        else:
+            self._stopping = True
+
+    def _requeue(self, slot: int) -> None:
+        """Return jobs taken by the worker in `slot` but never answered."""
+        import redis
+
+        from .memory import REDIS_HOST, REDIS_PORT
+
+        processing = PROCESSING_KEY.format(slot)
+        requeued = 0
+        try:
+            with redis.Redis(host=REDIS_HOST, port=REDIS_PORT) as client:
+                # Oldest job ends up first in line again.
+                while client.lmove(processing, QUEUE_KEY, "RIGHT", "LEFT"):
+                    requeued += 1
+        except Exception as exc:
+            logger.error("Could not requeue jobs of worker %d: %s", slot, exc)
+        if requeued:
+            logger.warning("Requeued %d unfinished jobs of worker %d", requeued, slot)
+
+    def _reap(self) -> None:
+        while self.pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            slot = self.pids.pop(pid, None)
+            if slot is None:
+                continue
+            if self._restarting == slot:
+                self._restarting = None
+            elif not self._stopping:
+                logger.warning("Worker %d (pid %d) exited with %d", slot, pid, status)
+            self._requeue(slot)
+            if not self._stopping:
+                self.spawn(slot)
+
+    def _supervise(self) -> None:
+        now = time.time()
+        for pid, slot in list(self.pids.items()):
+            if now - self._field(slot, HEARTBEAT) > self.heartbeat_timeout:
+                logger.error("Worker %d (pid %d) stalled; killing", slot, pid)
+                os.kill(pid, signal.SIGKILL)
+        # Rolling restart: retire the next worker once the previous one is back.
+        if self._restarting is None and self._restart_slots:
+            slot = self._restart_slots.pop(0)
+            pid = int(self._field(slot, PID))
+            if pid in self.pids:
+                self._restarting = slot
+                os.kill(pid, signal.SIGTERM)
+
+    def _shutdown(self) -> None:
+        for pid in list(self.pids):
+            os.kill(pid, signal.SIGTERM)
+        expires_at = time.monotonic() + self.graceful_timeout
+        while self.pids and time.monotonic() < expires_at:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self.pids):
+            os.kill(pid, signal.SIGKILL)
+        while self.pids:
+            pid, _ = os.waitpid(-1, 0)
+            slot = self.pids.pop(pid, None)
+            if slot is not None:
+                self._requeue(slot)
+
+    def run(self) -> None:
+        """Preload models, fork workers and supervise until stopped."""
+        preload_models()
+        for slot in range(self.workers):
+            self._requeue(slot)  # Left over if the previous server was killed
+            self.spawn(slot)
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self._on_signal)
+        server = self._metrics_server()
+        logger.info(
+            "Serving with %d workers; metrics on http://%s:%d/metrics",
+            self.workers,
+            *self.metrics_address,
+        )
+        try:
+            while not self._stopping:
+                server.handle_request()
+                self._reap()
+                self._supervise()
+        finally:
+            server.server_close()
+            self._shutdown()
+
+
+def _rss_bytes(pid: int) -> int:
+    """Resident set size of a process from /proc, or 0 if unavailable."""
+    try:
+        with open(f"/proc/{pid}/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Entry point for the `codeforge` command line.
+
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:]).
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="codeforge")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="Run the pre-fork workflow server.")
+    serve.add_argument(
+        "--workers", type=int, default=settings.serve_workers or os.cpu_count() or 1
+    )
+    serve.add_argument("--concurrency", type=int, default=settings.serve_concurrency)
+    serve.add_argument("--metrics-host", default="127.0.0.1")
+    serve.add_argument("--metrics-port", type=int, default=settings.serve_metrics_port)
+    serve.add_argument(
+        "--max-jobs", type=int, default=0, help="Recycle workers after N jobs."
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(process)d %(name)s: %(message)s"
+    )
+    PreforkServer(
+        workers=args.workers,
+        concurrency=args.concurrency,
+        metrics_host=args.metrics_host,
+        metrics_port=args.metrics_port,
+        max_jobs=args.max_jobs,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
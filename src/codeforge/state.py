@@ -4,29 +4,38 @@
 This module defines the state structure and utilities for hierarchical memory.
 """
 
+import operator
 from collections import deque
 from typing import Annotated, Any, TypedDict
 
 from langgraph.checkpoint.memory import MemorySaver
-from langgraph.graph.message import add_messages
 
 
 class State(TypedDict):
     """Workflow state for CodeForge AI.
 
     Attributes:
-        messages: Short-term shared messages, annotated for addition.
+        messages: Short-term shared messages as role/content dicts; node
+            updates are appended.
         task_queue: In-memory task queue.
         private: Per-agent private state.
         long_term: Persistent long-term state via checkpointer.
         input: Input query or PRD.
+        task: Current task under debate and implementation.
+        response: Implementation produced for the final task.
+        model: Model that produced `response`.
+        tokens: Tokens spent on the implement call.
     """
 
-    messages: Annotated[list[dict[str, Any]], add_messages]
+    messages: Annotated[list[dict[str, Any]], operator.add]
     task_queue: deque[str]
     private: dict[str, Any]
     long_term: dict[str, Any]
     input: str
+    task: str
+    response: str
+    model: str
+    tokens: int
 
 
 def cap_messages(state: State, max_messages: int = 50) -> State:
@@ -4,122 +4,232 @@
 This module implements advanced GraphRAG+ with hybrid DB and web integration.
 """
 
-from typing import Any, Optional
+import logging
+from typing import Any, Callable, Optional
 
 from neo4j import AsyncGraphDatabase, GraphDatabase
 from qdrant_client import AsyncQdrantClient, QdrantClient
 from sentence_transformers import SentenceTransformer
 from tavily import TavilyClient
-from tenacity import retry, stop_after_attempt, wait_fixed
 
 from .config import settings
+from .graph_cache import GraphCache, run_query
+from .resilience import Deadline, call_stage, get_deadline
+from .retrieval_cache import RetrievalCache, bump_index_version, index_version
+from .vector_store import VectorStore, build_vector_store
+
+logger = logging.getLogger(__name__)
 
 qdrant: Optional[AsyncQdrantClient | QdrantClient] = (
-    AsyncQdrantClient(url=settings.qdrant_url)
+    None
+    if settings.vector_backend == "local"
+    else AsyncQdrantClient(url=settings.qdrant_url)
     if settings.use_async
     else QdrantClient(url=settings.qdrant_url)
 )
+# Matryoshka prefix of the query embedding used per content type.
+QUERY_DIMS: dict[str, int] = {"code": 256, "general": 768}
+vector_store: VectorStore = build_vector_store(qdrant, sorted(set(QUERY_DIMS.values())))
+# The embedded store has no remote dependency to break on.
+vector_dependency: Optional[str] = "qdrant" if qdrant is not None else None
 neo4j_driver: Optional[AsyncGraphDatabase | GraphDatabase] = (
     AsyncGraphDatabase.driver(settings.neo4j_uri, auth=("neo4j", "password"))
     if settings.use_async
     else GraphDatabase.driver(settings.neo4j_uri, auth=("neo4j", "password"))
 )
+graph_cache: GraphCache = GraphCache(
+    settings.graph_refresh_seconds, settings.graph_full_refresh_seconds
+)
+retrieval_cache: RetrievalCache = RetrievalCache(
+    settings.retrieval_cache_size,
+    settings.retrieval_cache_ttl,
+    settings.semantic_cache_threshold if settings.use_semantic_cache else None,
+)
 tavily: TavilyClient = TavilyClient(api_key=settings.tavily_api_key)
 embedder: SentenceTransformer = SentenceTransformer("BAAI/bge-m3", device="cpu")
 sparse_embedder: Optional[SentenceTransformer] = (
     SentenceTransformer("BAAI/bge-sparse-en-v1.5") if settings.use_sparse else None
 )
 
+INGEST_QUERY: str = (
+    "MERGE (n:WebResult {content: $content}) RETURN elementId(n) AS node_id"
+)
+GRAPH_QUERY: str = (
+    "MATCH (n) WHERE n.content CONTAINS $query RETURN n, elementId(n) AS node_id"
+)
+RESULT_LIMIT: int = 10
+EXPANSION_SLOTS: int = 3  # Result slots reserved for graph-expanded nodes
+
+
+async def _optional_stage(
+    dependency: str,
+    fn: Callable[..., Any],
+    *args: Any,
+    default: Any,
+    skipped: Optional[list[str]] = None,
+    **kwargs: Any,
+) -> Any:
+    """Run a stage whose loss degrades results instead of failing retrieval.
+
+    Any error left after the stage's retries (open circuit, spent deadline,
+    connection or timeout errors) is logged; the breaker has already counted
+    it. Skipped stages are appended to `skipped` so degraded results are not
+    cached.
+    """
+    try:
+        return await call_stage(dependency, fn, *args, **kwargs)
+    except Exception as exc:
+        logger.warning("Skipping %s stage: %r", dependency, exc)
+        if skipped is not None:
+            skipped.append(dependency)
+        return default
+
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
 async def graphrag_plus(
-    query: str, content_type: str = "general"
+    query: str,
+    content_type: str = "general",
+    hops: Optional[int] = None,
+    deadline: Optional[Deadline] = None,
 ) -> list[dict[str, Any]]:
     """Perform agentic hybrid GraphRAG+ retrieval with web fallback.
 
+    Vector and text-match hits that carry a graph `node_id` seed a k-hop
+    expansion served from the in-process adjacency cache; expanded nodes get
+    up to `EXPANSION_SLOTS` of the `RESULT_LIMIT` results. Each stage is
+    retried on its own within the deadline; the web fallback and graph stages
+    are skipped when their dependency's circuit is open or time runs out.
+
+    Complete results are cached per query, content type and depth until the
+    next index write; with `use_semantic_cache`, near-identical queries reuse
+    them too.
+
     Args:
         query: Search query string.
         content_type: Type of content for embedding variation (default: "general").
+        hops: Graph expansion depth; 0 disables (default: settings.graph_hops).
+        deadline: Time budget (default: the workflow deadline in context).
 
     Returns:
         List of fused retrieval results.
     """
-    dim: int = 256 if content_type == "code" else 768
+    deadline = get_deadline(deadline)
+    hops = settings.graph_hops if hops is None else hops
+    scope: tuple[str, int] = (content_type, hops)
+    cached = retrieval_cache.get(query, scope)
+    if cached is not None:
+        return cached
+    version: int = index_version()  # Read before any stage touches the index
+    skipped: list[str] = []
+    deadline.check("embed")
+    dim: int = QUERY_DIMS.get(content_type, QUERY_DIMS["general"])
     query_embed: list[float] = embedder.encode(query)[:dim].tolist()
+    cached = retrieval_cache.get_similar(query_embed, scope)
+    if cached is not None:
+        return cached
     sparse_query: Optional[list[float]] = (
         sparse_embedder.encode(query).tolist() if sparse_embedder else None
     )
 
-    if settings.use_async and isinstance(qdrant, AsyncQdrantClient):
-        vector_results = await qdrant.aquery(
-            collection_name="docs",
-            query=query_embed,
-            limit=5,
-            sparse_vector=sparse_query,
-        )
-    else:
-        vector_results = qdrant.query(  # type: ignore
-            collection_name="docs",
-            query=query_embed,
-            limit=5,
-            sparse_vector=sparse_query,
-        )
+    vector_results: list[dict[str, Any]] = await call_stage(
+        vector_dependency,
+        vector_store.search,
+        query_embed,
+        limit=5,
+        sparse_vector=sparse_query,
+        deadline=deadline,
+    )
 
     if not vector_results:
-        web_results: list[dict[str, Any]] = tavily.search(query=query, max_results=5)
-        content: str = web_results[0]["content"]
-        web_embed: list[float] = embedder.encode(content).tolist()
-        web_sparse: Optional[list[float]] = (
-            sparse_embedder.encode(content).tolist() if sparse_embedder else None
+        web_results: list[dict[str, Any]] = await _optional_stage(
+            "tavily",
+            tavily.search,
+            query=query,
+            max_results=5,
+            default=[],
+            skipped=skipped,
+            deadline=deadline,
         )
-
-        if settings.use_async and isinstance(neo4j_driver, AsyncGraphDatabase):
-            async with neo4j_driver.session() as session:
-                await session.run(
-                    "CREATE (n:WebResult {content: $content})", content=content
-                )
-            await qdrant.aupsert(
-                collection_name="docs",
-                points=[
-                    {"id": "web1", "vector": web_embed, "sparse_vector": web_sparse}
-                ],
+        if web_results:
+            content: str = web_results[0]["content"]
+            web_embed: list[float] = embedder.encode(content).tolist()
+            web_sparse: Optional[list[float]] = (
+                sparse_embedder.encode(content).tolist() if sparse_embedder else None
             )
-            vector_results = await qdrant.aquery(
-                collection_name="docs",
-                query=query_embed,
-                limit=5,
-                sparse_vector=sparse_query,
+            # MERGE keeps the write idempotent under stage retries.
+            created: list[dict[str, Any]] = await _optional_stage(
+                "neo4j",
+                run_query,
+                neo4j_driver,
+                INGEST_QUERY,
+                content=content,
+                default=[],
+                skipped=skipped,
+                deadline=deadline,
             )
-        else:
-            with neo4j_driver.session() as session:  # type: ignore
-                session.run("CREATE (n:WebResult {content: $content})", content=content)
-            qdrant.upsert(  # type: ignore
-                collection_name="docs",
-                points=[
-                    {"id": "web1", "vector": web_embed, "sparse_vector": web_sparse}
+            if created:
+                bump_index_version()
+            await call_stage(
+                vector_dependency,
+                vector_store.upsert,
+                [
+                    {
+                        "id": "web1",
+                        "vector": web_embed,
+                        "sparse_vector": web_sparse,
+                        "payload": {
+                            "content": content,
+                            "node_id": created[0]["node_id"] if created else None,
+                        },
+                    }
                 ],
+                deadline=deadline,
             )
-            vector_results = qdrant.query(  # type: ignore
-                collection_name="docs",
-                query=query_embed,
+            vector_results = await call_stage(
+                vector_dependency,
+                vector_store.search,
+                query_embed,
                 limit=5,
                 sparse_vector=sparse_query,
+                deadline=deadline,
             )
 
-    if settings.use_async and isinstance(neo4j_driver, AsyncGraphDatabase):
-        async with neo4j_driver.session() as session:
-            graph_results: list[dict[str, Any]] = (
-                await session.run(
-                    "MATCH (n) WHERE n.content CONTAINS $query RETURN n", query=query
-                )
-            ).data()
-    else:
-        with neo4j_driver.session() as session:  # type: ignore
-            graph_results: list[dict[str, Any]] = session.run(
-                "MATCH (n) WHERE n.content CONTAINS $query RETURN n", query=query
-            ).data()
-
-    fused: list[dict[str, Any]] = vector_results + graph_results  # type: ignore
+    graph_results: list[dict[str, Any]] = await _optional_stage(
+        "neo4j",
+        run_query,
+        neo4j_driver,
+        GRAPH_QUERY,
+        query=query,
+        default=[],
+        skipped=skipped,
+        deadline=deadline,
+    )
+
+    direct: list[dict[str, Any]] = vector_results + graph_results  # type: ignore
     if settings.use_sparse:
-        fused = sorted(fused, key=lambda x: x.get("sparse_score", 0), reverse=True)
-    return fused[:10]
+        direct = sorted(direct, key=lambda x: x.get("sparse_score", 0), reverse=True)
+    seeds: list[str] = [
+        r["node_id"] for r in direct if isinstance(r, dict) and r.get("node_id")
+    ]
+    # Only fetch as many expanded nodes as can survive the result cap.
+    room: int = RESULT_LIMIT - min(len(direct), RESULT_LIMIT - EXPANSION_SLOTS)
+    expanded: list[dict[str, Any]] = (
+        await _optional_stage(
+            "neo4j",
+            graph_cache.expand,
+            neo4j_driver,
+            seeds,
+            hops,
+            room,
+            default=[],
+            skipped=skipped,
+            deadline=deadline,
+        )
+        if hops and seeds
+        else []
+    )
+
+    # Direct hits backfill any reserved slots expansion left unused.
+    fused = direct[: RESULT_LIMIT - len(expanded)] + expanded
+    if not skipped:
+        retrieval_cache.put(query, scope, fused, version, query_embed)
+    return fused
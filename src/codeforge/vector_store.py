@@ -0,0 +1,490 @@
+# coding=utf-8
+"""Pluggable vector stores for CodeForge AI retrieval.
+
+This module defines the vector-store interface used by GraphRAG+ with a remote
+Qdrant backend and an embedded, memory-mapped NumPy backend for single-node use.
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, NamedTuple, Optional, Sequence
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from .config import settings
+from .retrieval_cache import bump_index_version
+
+try:  # Optional ANN index for the local backend
+    import hnswlib
+except ImportError:  # pragma: no cover - exercised only without the extra
+    hnswlib = None
+
+
+class VectorStore(ABC):
+    """Interface shared by all vector-store backends.
+
+    Attributes:
+        name: Dependency name used for metrics and circuit breaking.
+    """
+
+    name: str = "vector"
+
+    @abstractmethod
+    async def search(
+        self,
+        vector: list[float],
+        limit: int = 5,
+        sparse_vector: Optional[list[float]] = None,
+    ) -> list[dict[str, Any]]:
+        """Return the nearest points to a query vector.
+
+        Args:
+            vector: Dense query vector.
+            limit: Maximum number of hits (default: 5).
+            sparse_vector: Optional sparse query vector.
+
+        Returns:
+            List of hit dictionaries, best first.
+        """
+
+    @abstractmethod
+    async def upsert(self, points: list[dict[str, Any]]) -> None:
+        """Insert or replace points.
+
+        Args:
+            points: Dicts with "id", "vector" and optional "payload".
+        """
+
+
+def _as_hit(point: Any) -> dict[str, Any]:
+    """Flatten a Qdrant scored point into the {"id", "score", **payload} hit shape."""
+    if isinstance(point, dict):
+        return point
+    return {
+        "id": point.id,
+        "score": point.score,
+        **(getattr(point, "payload", None) or {}),
+    }
+
+
+class QdrantVectorStore(VectorStore):
+    """Vector store backed by a remote Qdrant collection.
+
+    Scored points are flattened to the same hit dicts the local backend
+    returns, so payload fields such as `node_id` are visible to callers.
+    """
+
+    name = "qdrant"
+
+    def __init__(
+        self, client: AsyncQdrantClient | QdrantClient, collection: str = "docs"
+    ) -> None:
+        self.client = client
+        self.collection = collection
+
+    async def search(
+        self,
+        vector: list[float],
+        limit: int = 5,
+        sparse_vector: Optional[list[float]] = None,
+    ) -> list[dict[str, Any]]:
+        if settings.use_async and isinstance(self.client, AsyncQdrantClient):
+            response = await self.client.aquery(
+                collection_name=self.collection,
+                query=vector,
+                limit=limit,
+                sparse_vector=sparse_vector,
+            )
+        else:
+            response = await asyncio.to_thread(
+                self.client.query,  # type: ignore
+                collection_name=self.collection,
+                query=vector,
+                limit=limit,
+                sparse_vector=sparse_vector,
+            )
+        return [_as_hit(point) for point in getattr(response, "points", response)]
+
+    async def upsert(self, points: list[dict[str, Any]]) -> None:
+        if settings.use_async and isinstance(self.client, AsyncQdrantClient):
+            await self.client.aupsert(collection_name=self.collection, points=points)
+        else:
+            await asyncio.to_thread(
+                self.client.upsert,  # type: ignore
+                collection_name=self.collection,
+                points=points,
+            )
+        bump_index_version()
+
+
+class _Snapshot(NamedTuple):
+    """Immutable view of the on-disk index handed to readers."""
+
+    matrix: Optional[np.ndarray]
+    ids: list[Any]
+    payloads: list[dict[str, Any]]
+    live: np.ndarray
+    norms: dict[int, np.ndarray]
+    stamp: tuple[int, int]
+
+
+class LocalVectorStore(VectorStore):
+    """Embedded vector store on memory-mapped NumPy arrays.
+
+    Rows are appended to a raw float32 file and published by atomically
+    replacing a small manifest, so readers (threads or other processes) always
+    map a consistent prefix without copying it into memory. Re-upserting an id
+    appends a new row and masks the old one until `compact` is called. Writers
+    in different processes (e.g. `codeforge serve` workers) are serialized by
+    an exclusive `flock` on a lock file next to the manifest.
+
+    Search is exact cosine similarity computed as blocked matrix products over
+    the mapped rows. When `use_hnsw` is set and `hnswlib` is installed, one
+    HNSW index is kept per prefix dimension in `hnsw_dims` (default: the full
+    dimension), and queries of exactly that length go through it instead.
+    """
+
+    name = "local"
+
+    _MANIFEST = "manifest.json"
+    _WRITE_LOCK = "write.lock"
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        dim: Optional[int] = None,
+        use_hnsw: bool = False,
+        block_rows: int = 16384,
+        hnsw_dims: Optional[Sequence[int]] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.block_rows = block_rows
+        self._lock = threading.RLock()
+        self._hnsw: dict[int, Any] = {}
+        self._hnsw_deleted: dict[int, set[int]] = {}
+        self._hnsw_dims: tuple[int, ...] = tuple(hnsw_dims or ())
+        self._use_hnsw = use_hnsw and hnswlib is not None
+        self._manifest: dict[str, Any] = {"dim": dim, "count": 0, "generation": 0}
+        self._snapshot = self._load()
+        if self._use_hnsw and self.dim:
+            self._sync_hnsw()
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Stored vector dimension, fixed by the first upsert."""
+        return self._manifest["dim"]
+
+    def _file(self, kind: str, generation: Optional[int] = None) -> Path:
+        gen = self._manifest["generation"] if generation is None else generation
+        return self.path / f"{kind}.{gen}"
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Hold the in-process and cross-process write locks, then refresh."""
+        with self._lock, open(self.path / self._WRITE_LOCK, "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                self.refresh()  # Append after rows other processes published
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _write_manifest(self, manifest: dict[str, Any]) -> None:
+        tmp = self.path / f"{self._MANIFEST}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, self.path / self._MANIFEST)
+
+    def _manifest_stamp(self) -> tuple[int, int]:
+        # os.replace gives every published manifest a fresh inode.
+        try:
+            stat = (self.path / self._MANIFEST).stat()
+        except FileNotFoundError:
+            return (0, 0)
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _load(self) -> _Snapshot:
+        stamp = self._manifest_stamp()
+        generation = self._manifest["generation"]
+        try:
+            self._manifest = json.loads((self.path / self._MANIFEST).read_text())
+        except FileNotFoundError:
+            pass
+        if self._manifest["generation"] != generation:  # Compacted elsewhere
+            self._hnsw = {}
+        count: int = self._manifest["count"]
+        if not count:
+            return _Snapshot(None, [], [], np.zeros(0, dtype=bool), {}, stamp)
+        matrix = np.memmap(
+            self._file("vectors"), dtype=np.float32, mode="r", shape=(count, self.dim)
+        )
+        ids: list[Any] = []
+        payloads: list[dict[str, Any]] = []
+        with open(self._file("payloads"), encoding="utf-8") as fh:
+            for line, _ in zip(fh, range(count)):
+                record = json.loads(line)
+                ids.append(record["id"])
+                payloads.append(record.get("payload") or {})
+        latest: dict[Any, int] = {pid: row for row, pid in enumerate(ids)}
+        live = np.zeros(count, dtype=bool)
+        live[list(latest.values())] = True
+        return _Snapshot(matrix, ids, payloads, live, {}, stamp)
+
+    def refresh(self) -> None:
+        """Re-map the index if another writer published new rows."""
+        if self._manifest_stamp() != self._snapshot.stamp:
+            with self._lock:
+                if self._manifest_stamp() != self._snapshot.stamp:
+                    self._snapshot = self._load()
+                    if self._use_hnsw:
+                        self._sync_hnsw()
+
+    def __len__(self) -> int:
+        return int(self._snapshot.live.sum())
+
+    def _sync_hnsw(self) -> None:
+        """Create or load the HNSW indexes and add rows they have not seen yet."""
+        snap = self._snapshot
+        count = len(snap.ids)
+        for d in self._hnsw_dims or (self.dim,):
+            if d > self.dim:  # type: ignore[operator]
+                continue
+            index = self._hnsw.get(d)
+            if index is None:
+                index = self._hnsw[d] = hnswlib.Index(space="cosine", dim=d)
+                self._hnsw_deleted[d] = set()
+                index_file = self._file(f"hnsw{d}")
+                if index_file.exists():
+                    index.load_index(str(index_file), max_elements=max(count, 1))
+                else:
+                    index.init_index(max_elements=max(count, 1024), M=16)
+                index.set_ef(64)
+            seen: int = index.element_count
+            if count > index.get_max_elements():
+                index.resize_index(max(count, 2 * index.get_max_elements()))
+            if count > seen:
+                # Cosine space normalizes, so prefix rows index truncated embeddings.
+                index.add_items(
+                    np.asarray(snap.matrix[seen:count, :d]), np.arange(seen, count)
+                )
+            deleted = self._hnsw_deleted[d]
+            for row in np.flatnonzero(~snap.live):
+                if int(row) not in deleted:
+                    try:
+                        index.mark_deleted(int(row))
+                    except RuntimeError:  # Already deleted in a saved index
+                        pass
+                    deleted.add(int(row))
+
+    def search_batch(
+        self, queries: np.ndarray, limit: int = 5
+    ) -> list[list[dict[str, Any]]]:
+        """Exact cosine search for a batch of queries.
+
+        Queries shorter than the stored dimension are matched against the same
+        leading dimensions, which suits Matryoshka-style truncated embeddings.
+
+        Args:
+            queries: Array of shape (batch, d) with d <= stored dimension.
+            limit: Hits per query (default: 5).
+
+        Returns:
+            One hit list per query, best first.
+        """
+        self.refresh()
+        snap = self._snapshot
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if snap.matrix is None or limit <= 0:
+            return [[] for _ in range(len(queries))]
+        d = queries.shape[1]
+        if d > self.dim:  # type: ignore[operator]
+            raise ValueError(f"Query dimension {d} exceeds index dimension {self.dim}.")
+        queries = queries / np.maximum(
+            np.linalg.norm(queries, axis=1, keepdims=True), 1e-12
+        )
+        k = min(limit, len(snap.ids))
+        norms = snap.norms.get(d)
+        if norms is None:  # Prefix norms are computed once per snapshot
+            norms = np.empty(len(snap.ids), dtype=np.float32)
+            for start in range(0, len(snap.ids), self.block_rows):
+                block = snap.matrix[start : start + self.block_rows, :d]
+                norms[start : start + len(block)] = np.linalg.norm(block, axis=1)
+            norms = snap.norms.setdefault(d, np.maximum(norms, 1e-12))
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, len(snap.ids), self.block_rows):
+            block = np.asarray(snap.matrix[start : start + self.block_rows, :d])
+            stop = start + len(block)
+            scores = (queries @ block.T) / norms[start:stop]
+            scores[:, ~snap.live[start:stop]] = -np.inf
+            scores = np.concatenate([best_scores, scores], axis=1)
+            rows = np.concatenate(
+                [
+                    best_rows,
+                    np.broadcast_to(np.arange(start, stop), (len(queries), len(block))),
+                ],
+                axis=1,
+            )
+            if scores.shape[1] > k:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, top, axis=1)
+                rows = np.take_along_axis(rows, top, axis=1)
+            best_scores, best_rows = scores, rows
+        return [
+            self._hits(snap, best_rows[i], best_scores[i]) for i in range(len(queries))
+        ]
+
+    def _hits(
+        self, snap: _Snapshot, rows: np.ndarray, scores: np.ndarray
+    ) -> list[dict[str, Any]]:
+        order = np.argsort(-scores, kind="stable")
+        return [
+            {
+                "id": snap.ids[rows[j]],
+                "score": float(scores[j]),
+                **snap.payloads[rows[j]],
+            }
+            for j in order
+            if np.isfinite(scores[j])
+        ]
+
+    async def search(
+        self,
+        vector: list[float],
+        limit: int = 5,
+        sparse_vector: Optional[list[float]] = None,
+    ) -> list[dict[str, Any]]:
+        """Search the local index; sparse vectors are ignored by this backend.
+
+        The scan runs in a worker thread (NumPy releases the GIL), so a large
+        index never blocks the event loop or the stage timeout around it.
+        """
+        return await asyncio.to_thread(self._search, vector, limit)
+
+    def _search(self, vector: list[float], limit: int) -> list[dict[str, Any]]:
+        self.refresh()
+        with self._lock:
+            # The snapshot and its HNSW index must be read together: labels
+            # refer to row numbers of the snapshot they were built from.
+            snap = self._snapshot
+            index = self._hnsw.get(len(vector))
+            if index is not None:
+                k = min(limit, int(snap.live.sum()))
+                if k <= 0:
+                    return []
+                labels, distances = index.knn_query(
+                    np.asarray(vector, dtype=np.float32), k=k
+                )
+                return self._hits(snap, labels[0].astype(np.int64), 1.0 - distances[0])
+        return self.search_batch(np.asarray([vector]), limit)[0]
+
+    async def upsert(self, points: list[dict[str, Any]]) -> None:
+        """Append points; disk writes and index updates run in a worker thread."""
+        if not points:
+            return
+        await asyncio.to_thread(self._upsert, points)
+        bump_index_version()
+
+    def _upsert(self, points: list[dict[str, Any]]) -> None:
+        vectors = np.asarray([p["vector"] for p in points], dtype=np.float32)
+        with self._writing():
+            manifest = dict(self._manifest)
+            if manifest["dim"] is None:
+                manifest["dim"] = vectors.shape[1]
+            if vectors.shape[1] != manifest["dim"]:
+                raise ValueError(
+                    f"Vector dimension {vectors.shape[1]} does not match "
+                    f"index dimension {manifest['dim']}."
+                )
+            # Truncate any torn tail left by a crashed writer before appending.
+            with open(self._file("vectors"), "ab") as fh:
+                fh.truncate(manifest["count"] * manifest["dim"] * 4)
+                fh.write(vectors.tobytes())
+                fh.flush()
+                os.fsync(fh.fileno())
+            with open(self._file("payloads"), "ab") as fh:
+                fh.truncate(manifest.get("payload_bytes", 0))
+                for p in points:
+                    record = {"id": p["id"], "payload": p.get("payload")}
+                    fh.write((json.dumps(record) + "\n").encode("utf-8"))
+                fh.flush()
+                os.fsync(fh.fileno())
+                manifest["payload_bytes"] = fh.tell()
+            manifest["count"] += len(points)
+            self._write_manifest(manifest)
+            self._snapshot = self._load()
+            if self._use_hnsw:
+                self._sync_hnsw()
+
+    def compact(self) -> None:
+        """Rewrite the index into a new generation with one row per id.
+
+        Readers still mapping the previous generation keep working until they
+        refresh; its files are removed once the new manifest is published.
+        """
+        with self._writing():
+            snap = self._snapshot
+            if snap.matrix is None or snap.live.all():
+                return
+            old = self._manifest["generation"]
+            gen = old + 1
+            rows = np.flatnonzero(snap.live)
+            np.asarray(snap.matrix[rows]).tofile(self._file("vectors", gen))
+            with open(self._file("payloads", gen), "wb") as fh:
+                for row in rows:
+                    record = {"id": snap.ids[row], "payload": snap.payloads[row]}
+                    fh.write((json.dumps(record) + "\n").encode("utf-8"))
+                payload_bytes = fh.tell()
+            self._write_manifest(
+                {
+                    "dim": self.dim,
+                    "count": len(rows),
+                    "generation": gen,
+                    "payload_bytes": payload_bytes,
+                }
+            )
+            for kind in ("vectors", "payloads"):
+                self._file(kind, old).unlink(missing_ok=True)
+            for index_file in self.path.glob(f"hnsw*.{old}"):
+                index_file.unlink(missing_ok=True)
+            self._hnsw = {}
+            self._snapshot = self._load()
+            if self._use_hnsw:
+                self._sync_hnsw()
+
+    def flush(self) -> None:
+        """Persist the HNSW indexes so the next load skips rebuilding them."""
+        with self._lock:
+            for d, index in self._hnsw.items():
+                index.save_index(str(self._file(f"hnsw{d}")))
+
+
+def build_vector_store(
+    client: Optional[AsyncQdrantClient | QdrantClient] = None,
+    query_dims: Optional[Sequence[int]] = None,
+) -> VectorStore:
+    """Build the vector store selected by settings.
+
+    Args:
+        client: Qdrant client for the remote backend.
+        query_dims: Query embedding dimensions to index with HNSW locally.
+
+    Returns:
+        Configured vector store instance.
+    """
+    if settings.vector_backend == "local":
+        return LocalVectorStore(
+            settings.vector_store_path,
+            use_hnsw=settings.use_hnsw,
+            hnsw_dims=query_dims,
+        )
+    if client is None:
+        raise ValueError("A Qdrant client is required for the qdrant backend.")
+    return QdrantVectorStore(client)
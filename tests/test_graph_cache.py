@@ -0,0 +1,111 @@
+# coding=utf-8
+"""Tests for the graph adjacency cache in CodeForge AI.
+
+This module contains tests for CSR snapshots and multi-hop expansion.
+"""
+
+import asyncio
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from codeforge.graph_cache import AdjacencySnapshot, GraphCache
+from codeforge.resilience import CircuitBreaker
+from codeforge.retrieval_cache import index_version
+
+EDGES: list[dict[str, Any]] = [
+    {"rid": 0, "src": "fastapi", "dst": "starlette"},
+    {"rid": 1, "src": "starlette", "dst": "anyio"},
+    {"rid": 2, "src": "anyio", "dst": "asyncio"},
+]
+
+
+def test_snapshot_multi_hop_expand() -> None:
+    """Test k-hop expansion; real-world: dependency chain fastapi -> starlette -> anyio."""
+    snapshot = AdjacencySnapshot.empty().with_edges(EDGES)
+    assert snapshot.expand(["fastapi"], hops=1) == [("starlette", 1)], (
+        "Expected direct neighbor only"
+    )
+    assert snapshot.expand(["fastapi"], hops=3) == [
+        ("starlette", 1),
+        ("anyio", 2),
+        ("asyncio", 3),
+    ], "Expected one node per hop along the chain"  # Insight: BFS order
+    assert len(snapshot.expand(["anyio"], hops=1, max_nodes=1)) == 1, (
+        "Expected fan-out cap on two neighbors"
+    )
+    assert snapshot.expand(["unknown"], hops=2) == [], (
+        "Expected no expansion for unseen seed"
+    )
+
+
+def test_snapshot_incremental_edges() -> None:
+    """Test incremental merge keeps old snapshot intact; real-world: new import edge ingested."""
+    base = AdjacencySnapshot.empty().with_edges(EDGES[:1])
+    grown = base.with_edges([{"rid": 5, "src": "starlette", "dst": "httpx"}])
+    assert base.expand(["starlette"]) == [("fastapi", 1)], (
+        "Expected old snapshot unchanged"
+    )
+    assert sorted(grown.expand(["starlette"])) == [("fastapi", 1), ("httpx", 1)]
+    assert grown.watermark == 5, "Expected watermark to track highest relationship id"
+
+
+@pytest.mark.asyncio
+async def test_cache_expand_fetches_properties_once() -> None:
+    """Test expansion uses one property lookup; real-world: seed from vector hit node."""
+    cache = GraphCache()
+    with patch(
+        "codeforge.graph_cache.run_query",
+        new_callable=AsyncMock,
+        side_effect=[
+            EDGES,
+            [
+                {"node_id": "starlette", "n": {"content": "ASGI toolkit"}},
+                {"node_id": "anyio", "n": {"content": "Async compat"}},
+            ],
+        ],
+    ) as mock_query:
+        results = await cache.expand(object(), ["fastapi"], hops=2)
+        assert [r["hops"] for r in results] == [1, 2], "Expected nearest nodes first"
+        assert mock_query.call_count == 2, (
+            "Expected one edge load and one property fetch"
+        )
+        assert mock_query.call_args.kwargs["ids"] == ["starlette", "anyio"]
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_failure_trips_breaker() -> None:
+    """Test stale-refresh failures are contained; real-world: Neo4j restarting mid-day."""
+    cache = GraphCache(refresh_seconds=0.01)
+    breaker = CircuitBreaker("neo4j", failure_threshold=1, reset_timeout=60.0)
+    calls = AsyncMock(side_effect=[EDGES, ConnectionError("bolt reset")])
+    with (
+        patch("codeforge.graph_cache.run_query", calls),
+        patch.dict("codeforge.resilience.breakers", {"neo4j": breaker}),
+    ):
+        await cache.ensure_fresh(driver=object())
+        await asyncio.sleep(0.02)
+        await cache.ensure_fresh(driver=object())
+        await cache._task
+    assert cache._task.exception() is None, "Expected failure handled, not leaked"
+    assert breaker.state == "open", "Expected refresh failure counted by breaker"
+    assert cache.snapshot.expand(["fastapi"]) == [("starlette", 1)], (
+        "Expected last good snapshot to keep serving"
+    )
+
+
+@pytest.mark.asyncio
+async def test_full_rebuild_bumps_version_only_on_change() -> None:
+    """Test periodic rebuilds keep retrieval hits; real-world: quiet graph rebuilt hourly."""
+    cache = GraphCache()
+    calls = AsyncMock(side_effect=[EDGES, [], EDGES, EDGES[:2]])
+    with patch("codeforge.graph_cache.run_query", calls):
+        await cache.refresh(driver=object(), full=True)
+        version = index_version()
+        await cache.refresh(driver=object())
+        await cache.refresh(driver=object(), full=True)
+        assert index_version() == version, "Expected unchanged graph to keep cache"
+        await cache.refresh(driver=object(), full=True)
+    assert index_version() == version + 1, "Expected deleted edge to drop cache"
+    assert cache.snapshot.expand(["anyio"]) == [("starlette", 1)]
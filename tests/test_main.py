@@ -95,9 +95,10 @@ async def test_autonomy_workflow_no_task() -> None:
         patch(
             "codeforge.main.route_model", new_callable=AsyncMock, return_value={"response": ""}
         ) as mock_route,
-        patch("redis.Redis.pubsub") as mock_pubsub,
+        patch(
+            "codeforge.main._next_message", new_callable=AsyncMock, return_value=None
+        ),
     ):
-        mock_pubsub.return_value.get_message.return_value = None
         result: dict[str, Any] = await run_autonomy_workflow("Empty task")
         assert len(result.get("task_queue", deque())) == 0, "Expected no task pulled"
         assert result.get("response", "") == "", (
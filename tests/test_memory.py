@@ -0,0 +1,134 @@
+# coding=utf-8
+"""Tests for Redis-backed long-term memory in CodeForge AI.
+
+This module contains tests for client-side caching and round-trip accounting.
+"""
+
+import asyncio
+import json
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from codeforge.memory import LongTermStore, stats_scope
+
+
+def make_store(values: dict[str, bytes]) -> tuple[LongTermStore, MagicMock]:
+    client = MagicMock()
+    client.mget = AsyncMock(side_effect=lambda keys: [values.get(k) for k in keys])
+    client.smembers = AsyncMock(
+        return_value={k[len("cf:lt:") :].encode() for k in values}
+    )
+    store = LongTermStore(client)
+    store._tracking = True  # Invalidation link assumed up
+    return store, client
+
+
+@pytest.mark.asyncio
+async def test_hot_keys_served_locally() -> None:
+    """Test client-side cache hits; real-world: coding conventions read by every workflow."""
+    store, client = make_store({"cf:lt:style": json.dumps("pep8").encode()})
+    with patch.object(store, "start", new_callable=AsyncMock), stats_scope() as stats:
+        assert await store.get("style") == "pep8"
+        assert await store.get("style") == "pep8"
+        assert await store.get("missing", "n/a") == "n/a"
+    assert client.mget.await_count == 2, (
+        "Expected second read of hot key served locally"
+    )
+    assert stats.local_hits == 1 and stats.local_misses == 2
+    assert stats.round_trips == 2, "Expected one MGET round trip per miss batch"
+    assert stats.as_dict()["hit_rate"] == pytest.approx(1 / 3)
+
+
+@pytest.mark.asyncio
+async def test_invalidation_drops_cached_key() -> None:
+    """Test server-assisted invalidation; real-world: another worker updates project goals."""
+    values = {"cf:lt:goal": json.dumps("mvp").encode()}
+    store, client = make_store(values)
+    with patch.object(store, "start", new_callable=AsyncMock):
+        assert await store.get("goal") == "mvp"
+        values["cf:lt:goal"] = json.dumps("phase2").encode()
+        store._on_invalidate([b"cf:lt:goal"])
+        assert await store.get("goal") == "phase2", (
+            "Expected fresh value after invalidation"
+        )
+        store._tracking = False
+        assert await store.get("goal") == "phase2"
+    assert client.mget.await_count == 3, "Expected cache bypass while link is down"
+
+
+@pytest.mark.asyncio
+async def test_load_and_save_batched() -> None:
+    """Test batched load/save; real-world: workflow restores and persists long-term state."""
+    store, client = make_store(
+        {"cf:lt:a": json.dumps(1).encode(), "cf:lt:b": json.dumps([2]).encode()}
+    )
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    client.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    client.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+    with patch.object(store, "start", new_callable=AsyncMock), stats_scope() as stats:
+        assert await store.load() == {"a": 1, "b": [2]}
+        assert await store.load() == {"a": 1, "b": [2]}
+        await store.save({"c": {"x": 3}})
+    assert stats.round_trips == 3, "Expected SMEMBERS + MGET once, then one pipeline"
+    assert pipe.set.call_count == 1 and pipe.sadd.call_count == 1
+    pipe.execute.assert_awaited_once()
+
+
+class FakeTrackingConnection:
+    """RESP3 connection stand-in that replays scripted replies and pushes."""
+
+    def __init__(self, replies: "asyncio.Queue[Any]", fail: bool = False) -> None:
+        self.replies = replies
+        self.fail = fail
+        self.sent: list[tuple[Any, ...]] = []
+
+    async def connect(self) -> None:
+        if self.fail:
+            raise ConnectionError("redis restarting")
+
+    async def send_command(self, *args: Any) -> None:
+        self.sent.append(args)
+
+    async def read_response(
+        self, timeout: Any = None, push_request: bool = False
+    ) -> Any:
+        return await self.replies.get()
+
+    async def disconnect(self) -> None:
+        return None
+
+
+@pytest.mark.asyncio
+async def test_listener_tracks_and_applies_pushes() -> None:
+    """Test the invalidation link end to end; real-world: Redis restart then a goal update."""
+    values = {"cf:lt:goal": json.dumps("mvp").encode()}
+    store, client = make_store(values)
+    store._tracking = False
+    replies: asyncio.Queue[Any] = asyncio.Queue()
+    connections = [
+        FakeTrackingConnection(replies, fail=True),
+        FakeTrackingConnection(replies),
+    ]
+    client.connection_pool.connection_class = MagicMock(side_effect=connections)
+    client.connection_pool.connection_kwargs = {"protocol": 3}
+    await store.start()
+    await replies.put(b"OK")
+    for _ in range(100):
+        if store._tracking:
+            break
+        await asyncio.sleep(0.01)
+    assert store._tracking, "Expected tracking after reconnecting with backoff"
+    assert connections[1].sent == [
+        ("CLIENT", "TRACKING", "ON", "BCAST", "PREFIX", "cf:lt:")
+    ]
+    assert await store.get("goal") == "mvp"
+    assert await store.get("goal") == "mvp"
+    values["cf:lt:goal"] = json.dumps("phase2").encode()
+    await replies.put([b"invalidate", [b"cf:lt:goal"]])
+    await asyncio.sleep(0.01)
+    assert await store.get("goal") == "phase2", "Expected push to drop cached key"
+    assert client.mget.await_count == 2, "Expected one local hit between pushes"
+    store._listener.cancel()
@@ -0,0 +1,197 @@
+# coding=utf-8
+"""Tests for pipelined execution in CodeForge AI.
+
+This module contains tests for speculative implementation and overlap stats.
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from codeforge.pipeline import run_pipelined
+from codeforge.state import State
+
+
+def make_state(task: str) -> State:
+    return {
+        "task": task,
+        "messages": [],
+        "input": task,
+        "task_queue": deque([task]),
+        "private": {},
+        "long_term": {},
+    }
+
+
+def fake_debate(refine_rounds: set[int]) -> Callable[..., Awaitable[State]]:
+    """Build a debate stand-in that refines the task on the given rounds."""
+
+    async def debate(
+        state: State,
+        rounds: int = 2,
+        research: Optional[asyncio.Future[list[dict[str, Any]]]] = None,
+        on_synthesis: Optional[Callable[[State], Awaitable[None]]] = None,
+    ) -> State:
+        for round_no in range(rounds):
+            await asyncio.sleep(0.05)  # Pro/con/moderator latency
+            state["messages"].append({"role": "moderator", "content": "Mod: pro"})
+            if round_no in refine_rounds:
+                state["task"] += " Refine based on debate."
+            if on_synthesis is not None:
+                await on_synthesis(state)
+        return state
+
+    return debate
+
+
+async def slow_implement(task: str, category: str) -> dict[str, Any]:
+    await asyncio.sleep(0.1)
+    return {"response": f"def add(a, b): return a + b  # {task}", "tokens": 120}
+
+
+@pytest.mark.asyncio
+async def test_pipeline_keeps_speculation() -> None:
+    """Test speculation kept on stable task; real-world: 'Generate add function' agreed in round 1."""
+    with (
+        patch("codeforge.pipeline.run_debate", side_effect=fake_debate(set())),
+        patch(
+            "codeforge.pipeline.route_model", side_effect=slow_implement
+        ) as mock_route,
+        patch(
+            "codeforge.pipeline.graphrag_plus",
+            new_callable=AsyncMock,
+            return_value=[{"content": "RAG: def add"}],
+        ),
+    ):
+        result = await run_pipelined(make_state("Generate add function"))
+    stats = result["private"]["pipeline"]
+    assert stats["kept"] and stats["speculated"], "Expected speculative result kept"
+    assert stats["saved_seconds"] >= 0.04, (
+        "Expected overlap with the second debate round"
+    )  # Insight: Implement hides debate latency
+    assert stats["wasted_tokens"] == 0, "Expected no waste when kept"
+    assert mock_route.call_count == 1, "Expected a single implement call"
+    assert "def add" in result["response"]
+    assert result["private"]["research"] == [{"content": "RAG: def add"}]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_cancels_stale_speculation() -> None:
+    """Test speculation cancelled on late refinement; real-world: debate reshapes 'microservices vs monolith'."""
+    with (
+        patch("codeforge.pipeline.run_debate", side_effect=fake_debate({1})),
+        patch(
+            "codeforge.pipeline.route_model", side_effect=slow_implement
+        ) as mock_route,
+        patch(
+            "codeforge.pipeline.graphrag_plus", new_callable=AsyncMock, return_value=[]
+        ),
+    ):
+        result = await run_pipelined(make_state("microservices vs monolith"))
+    stats = result["private"]["pipeline"]
+    assert not stats["kept"], "Expected speculation discarded after refinement"
+    assert stats["cancelled_inflight"] == 1, "Expected in-flight call cancelled"
+    assert stats["wasted_tokens"] > 0, "Expected estimated waste recorded"
+    assert mock_route.call_count == 2, "Expected a fresh implement on the final task"
+    assert result["task"].endswith("Refine based on debate."), (
+        "Expected final task used"
+    )
+
+
+@pytest.mark.asyncio
+async def test_pipeline_survives_research_failure() -> None:
+    """Test retrieval failure does not sink the run; real-world: Qdrant down mid-debate."""
+    with (
+        patch("codeforge.pipeline.run_debate", side_effect=fake_debate(set())),
+        patch("codeforge.pipeline.route_model", side_effect=slow_implement),
+        patch(
+            "codeforge.pipeline.graphrag_plus",
+            new_callable=AsyncMock,
+            side_effect=ConnectionError("qdrant unreachable"),
+        ),
+    ):
+        result = await run_pipelined(make_state("Generate add function"), rounds=1)
+    assert result["private"]["research"] == [], "Expected empty research on failure"
+    assert "def add" in result["response"], "Expected implementation still produced"
+
+
+@pytest.mark.asyncio
+async def test_pipeline_real_debate_gets_research() -> None:
+    """Test research reaches the real moderator; real-world: RAG snippet grounds round 2."""
+    calls: list[str] = []
+
+    async def model(task: str, category: str) -> dict[str, Any]:
+        calls.append(task)
+        await asyncio.sleep(0.01)
+        return {"response": "Pro: agreed" if category == "reasoning" else "code"}
+
+    with (
+        patch("codeforge.debate.route_model", side_effect=model),
+        patch("codeforge.pipeline.route_model", side_effect=model),
+        patch(
+            "codeforge.pipeline.graphrag_plus",
+            new_callable=AsyncMock,
+            return_value=[{"content": "RAG: def add"}],
+        ),
+    ):
+        result = await run_pipelined(make_state("Generate add function"))
+    moderations = [c for c in calls if c.startswith("Moderate:")]
+    assert len(moderations) == 2, "Expected the moderator to run every round"
+    assert "Context: RAG: def add" in moderations[1], (
+        "Expected finished research handed to the next moderator"
+    )
+    assert calls.index("Generate add function") > calls.index(moderations[0]), (
+        "Expected speculation to start only after a moderator synthesis"
+    )
+    assert len(result["messages"]) == 6 and result["private"]["pipeline"]["kept"]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_cancels_pending_work_on_timeout() -> None:
+    """Test deadline stops background calls; real-world: workflow timeout mid-implement."""
+    started: list[asyncio.Task[Any]] = []
+
+    async def hung(*args: Any) -> Any:
+        started.append(asyncio.current_task())  # type: ignore[arg-type]
+        await asyncio.sleep(10)
+
+    with (
+        patch("codeforge.pipeline.run_debate", side_effect=fake_debate(set())),
+        patch("codeforge.pipeline.route_model", side_effect=hung),
+        patch("codeforge.pipeline.graphrag_plus", side_effect=hung),
+    ):
+        with pytest.raises(TimeoutError):
+            async with asyncio.timeout(0.2):
+                await run_pipelined(make_state("Generate add function"))
+        await asyncio.sleep(0)
+    assert len(started) == 2, "Expected research and speculation to be running"
+    assert all(task.cancelled() for task in started), (
+        "Expected pending research and speculation cancelled"
+    )
+
+
+@pytest.mark.asyncio
+async def test_pipelined_graph_keeps_implementation() -> None:
+    """Test implement output survives the graph; real-world: serve returns the code."""
+    from codeforge.main import pipelined_graph
+
+    async def implement(task: str, category: str) -> dict[str, Any]:
+        return {"model": "coder", **await slow_implement(task, category)}
+
+    with (
+        patch("codeforge.pipeline.run_debate", side_effect=fake_debate(set())),
+        patch("codeforge.pipeline.route_model", side_effect=implement),
+        patch(
+            "codeforge.pipeline.graphrag_plus", new_callable=AsyncMock, return_value=[]
+        ),
+    ):
+        result = await pipelined_graph.ainvoke(
+            make_state("Generate add function"),
+            config={"configurable": {"thread_id": "test-pipelined-graph"}},
+        )
+    assert "def add" in result["response"], "Expected the implementation in state"
+    assert result["model"] == "coder" and result["tokens"] == 120
+    assert result["private"]["pipeline"]["kept"]
@@ -0,0 +1,91 @@
+# coding=utf-8
+"""Tests for deadlines, circuit breakers and stage retries in CodeForge AI.
+
+This module contains tests for bounded-latency stage execution.
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from codeforge.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceeded,
+    call_stage,
+    current_deadline,
+    deadline_scope,
+)
+
+
+@pytest.mark.asyncio
+async def test_stage_retries_only_failed_stage() -> None:
+    """Test stage-level retry; real-world: transient Neo4j hiccup on a read."""
+    query = AsyncMock(side_effect=[ConnectionError("bolt reset"), [{"n": "node"}]])
+    breaker = CircuitBreaker("neo4j", failure_threshold=5)
+    with patch.dict("codeforge.resilience.breakers", {"neo4j": breaker}):
+        result = await call_stage("neo4j", query, deadline=Deadline(5.0))
+    assert result == [{"n": "node"}], "Expected success on second attempt"
+    assert query.call_count == 2, "Expected exactly one retry of the stage"
+    assert breaker.state == "closed" and breaker.failures == 0, (
+        "Expected success to reset the breaker"
+    )
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_rejects_fast() -> None:
+    """Test breaker opening; real-world: Tavily outage must not stall retrieval."""
+    search = MagicMock(side_effect=ConnectionError("tavily down"))
+    breaker = CircuitBreaker("tavily", failure_threshold=2, reset_timeout=60.0)
+    with patch.dict("codeforge.resilience.breakers", {"tavily": breaker}):
+        with pytest.raises(ConnectionError):
+            await call_stage("tavily", search, attempts=2, deadline=Deadline(5.0))
+        assert breaker.state == "open", "Expected breaker open after threshold"
+        start = time.monotonic()
+        with pytest.raises(CircuitOpenError):
+            await call_stage("tavily", search, deadline=Deadline(5.0))
+        assert time.monotonic() - start < 0.1, "Expected immediate rejection"
+    assert search.call_count == 2, "Expected no calls while circuit is open"
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_slow_stage() -> None:
+    """Test deadline propagation; real-world: slow OpenRouter call within a 0.2s budget."""
+
+    async def slow_completion() -> str:
+        await asyncio.sleep(5)
+        return "late"
+
+    deadline = Deadline(0.2)
+    with deadline_scope(deadline):
+        assert current_deadline.get() is deadline, "Expected deadline in context"
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            await call_stage(None, slow_completion)
+    assert time.monotonic() - start < 1.0, "Expected latency bounded by the deadline"
+    assert current_deadline.get() is None, "Expected scope to reset the context"
+
+
+@pytest.mark.asyncio
+async def test_deadline_timeout_spares_breaker() -> None:
+    """Test budget timeouts are not failures; real-world: 0.1s left for a healthy Qdrant."""
+
+    async def search() -> list[str]:
+        await asyncio.sleep(1)
+        return ["hit"]
+
+    breaker = CircuitBreaker("qdrant", failure_threshold=1)
+    with patch.dict("codeforge.resilience.breakers", {"qdrant": breaker}):
+        with pytest.raises(DeadlineExceeded):
+            await call_stage("qdrant", search, deadline=Deadline(0.1), stage_timeout=5)
+        assert breaker.state == "closed" and breaker.failures == 0, (
+            "Expected a spent workflow budget not to count against Qdrant"
+        )
+        with pytest.raises(TimeoutError):
+            await call_stage(
+                "qdrant", search, deadline=Deadline(5.0), stage_timeout=0.1, attempts=1
+            )
+    assert breaker.state == "open", "Expected a stage timeout with budget left to count"
@@ -0,0 +1,66 @@
+# coding=utf-8
+"""Tests for the retrieval result cache in CodeForge AI.
+
+This module contains tests for exact and semantic hits, versioning and eviction.
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from codeforge.retrieval_cache import RetrievalCache, bump_index_version, index_version
+
+RESULTS = [{"content": "Use asyncio.gather for concurrent I/O", "node_id": "4:a:1"}]
+
+
+@pytest.mark.asyncio
+async def test_exact_hit_survives_formatting_and_respects_scope() -> None:
+    """Test normalized-key hits; real-world: the same research query re-asked."""
+    cache = RetrievalCache(max_entries=8, ttl=60)
+    cache.put("Async patterns in Python", ("code", 1), RESULTS, index_version())
+    assert cache.get("  async   PATTERNS in python ", ("code", 1)) == RESULTS, (
+        "Case and whitespace variants should share an entry"
+    )
+    assert cache.get("Async patterns in Python", ("general", 1)) is None, (
+        "Other content types must not reuse code results"
+    )
+    assert cache.stats.exact_hits == 1, "Exact tier hits should be counted"
+
+
+@pytest.mark.asyncio
+async def test_index_write_invalidates_entries() -> None:
+    """Test version tie-in; real-world: Tavily result ingested after a lookup."""
+    cache = RetrievalCache()
+    version = index_version()
+    cache.put("JWT auth", ("general", 1), RESULTS, version)
+    bump_index_version()
+    assert cache.get("JWT auth", ("general", 1)) is None, (
+        "Results from before an upsert must not be served"
+    )
+    cache.put("JWT auth", ("general", 1), RESULTS, version)
+    assert cache.get("JWT auth", ("general", 1)) is None, (
+        "Results computed across an index write must not be stored"
+    )
+    assert cache.stats.stale == 1, "Stale drops should be counted"
+
+
+@pytest.mark.asyncio
+async def test_semantic_tier_ttl_and_size() -> None:
+    """Test semantic reuse and eviction; real-world: paraphrased retrieval queries."""
+    cache = RetrievalCache(max_entries=2, ttl=60, semantic_threshold=0.95)
+    base = np.array([1.0, 0.0, 0.0])
+    version = index_version()
+    cache.put("async patterns", ("code", 1), RESULTS, version, base)
+    near = cache.get_similar(np.array([0.99, 0.05, 0.0]), ("code", 1))
+    far = cache.get_similar(np.array([0.0, 1.0, 0.0]), ("code", 1))
+    assert near == RESULTS and far is None, "Only close paraphrases should hit"
+    assert (cache.stats.semantic_hits, cache.stats.misses) == (1, 1)
+
+    cache.put("jwt auth", ("code", 1), RESULTS, version, np.array([0.0, 1.0, 0.0]))
+    cache.put("redis pool", ("code", 1), RESULTS, version, np.array([0.0, 0.0, 1.0]))
+    assert cache.get("async patterns", ("code", 1)) is None, "LRU entry should go"
+    assert cache.stats.evictions == 1, "Size evictions should be counted"
+    with patch("codeforge.retrieval_cache.time.monotonic", return_value=1e12):
+        assert cache.get("jwt auth", ("code", 1)) is None, "Expired entry served"
+    assert cache.stats.expired == 1, "TTL drops should be counted"
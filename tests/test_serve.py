@@ -0,0 +1,206 @@
+# coding=utf-8
+"""Tests for the multi-core serving runtime in CodeForge AI.
+
+This module contains tests for worker job handling and supervisor metrics.
+"""
+
+import ctypes
+import json
+import multiprocessing
+import os
+import socket
+import time
+from typing import Any, Optional
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from codeforge.serve import (
+    DONE,
+    FAILED,
+    FIELDS,
+    HEARTBEAT,
+    PID,
+    PROCESSING_KEY,
+    QUEUE_KEY,
+    PreforkServer,
+    WorkerRuntime,
+)
+
+
+class FakeRedis:
+    """In-memory stand-in for the queue and result lists."""
+
+    def __init__(self, jobs: list[dict[str, Any]]) -> None:
+        self.lists: dict[str, list[str]] = {QUEUE_KEY: [json.dumps(j) for j in jobs]}
+        self.expiry: dict[str, int] = {}
+
+    def lmove(
+        self, src: str, dest: str, wherefrom: str = "LEFT", whereto: str = "RIGHT"
+    ) -> Optional[str]:
+        items = self.lists.get(src)
+        if not items:
+            return None
+        value = items.pop(0 if wherefrom == "LEFT" else -1)
+        target = self.lists.setdefault(dest, [])
+        target.insert(0 if whereto == "LEFT" else len(target), value)
+        return value
+
+    async def blmove(
+        self, src: str, dest: str, timeout: float, wherefrom: str, whereto: str
+    ) -> Optional[str]:
+        return self.lmove(src, dest, wherefrom, whereto)
+
+    def rpush(self, key: str, value: str) -> None:
+        self.lists.setdefault(key, []).append(value)
+
+    def lrem(self, key: str, count: int, value: str) -> None:
+        self.lists[key].remove(value)
+
+    def expire(self, key: str, ttl: int) -> None:
+        self.expiry[key] = ttl
+
+    def pipeline(self, transaction: bool = True) -> "FakeRedis":
+        return self
+
+    async def execute(self) -> list[Any]:
+        return []
+
+    async def __aenter__(self) -> "FakeRedis":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        return None
+
+    def __enter__(self) -> "FakeRedis":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+def make_stats(slots: int = 1) -> Any:
+    return multiprocessing.RawArray(ctypes.c_double, slots * FIELDS)
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_queued_workflows() -> None:
+    """Test worker drains the queue; real-world: two PRDs submitted to one worker."""
+    fake = FakeRedis(
+        [{"id": "a", "input": "Build API"}, {"id": "b", "input": "Add auth"}]
+    )
+    stats = make_stats()
+    with (
+        patch("codeforge.memory.redis", fake),
+        patch(
+            "codeforge.main.run_autonomy_workflow",
+            AsyncMock(side_effect=lambda task, **kw: {"response": f"done: {task}"}),
+        ) as run_workflow,
+    ):
+        await WorkerRuntime(stats, 0, concurrency=2, max_jobs=2).run()
+    reply = json.loads(fake.lists["cf:results:b"][0])
+    assert reply == {"ok": True, "result": {"response": "done: Add auth"}}, (
+        "Result should be delivered on the job's result list"
+    )
+    assert stats[DONE] == 2 and stats[FAILED] == 0, "Both jobs should be counted"
+    assert fake.expiry["cf:results:a"] > 0, "Results should expire"
+    assert fake.lists[PROCESSING_KEY.format(0)] == [], (
+        "Answered jobs should leave the processing list"
+    )
+    assert run_workflow.call_args_list[0].kwargs == {"thread_id": "a"}, (
+        "Job id should name the checkpointer thread"
+    )
+
+
+@pytest.mark.asyncio
+async def test_worker_reports_failed_workflow() -> None:
+    """Test failures are returned and counted; real-world: LLM provider outage."""
+    fake = FakeRedis([{"id": "x", "input": "Build API"}])
+    stats = make_stats()
+    with (
+        patch("codeforge.memory.redis", fake),
+        patch(
+            "codeforge.main.run_autonomy_workflow",
+            AsyncMock(side_effect=RuntimeError("OpenRouter down")),
+        ),
+    ):
+        await WorkerRuntime(stats, 0, concurrency=1, max_jobs=1).run()
+    reply = json.loads(fake.lists["cf:results:x"][0])
+    assert not reply["ok"] and "OpenRouter down" in reply["error"], (
+        "Submitter should receive the error instead of timing out"
+    )
+    assert stats[FAILED] == 1, "Failure should show up in worker metrics"
+
+
+def test_supervisor_flags_stalled_worker() -> None:
+    """Test health reflects heartbeats; real-world: worker wedged in a C call."""
+    server = PreforkServer(workers=2, heartbeat_timeout=5.0)
+    now = time.time()
+    for slot, (pid, heartbeat) in enumerate([(os.getpid(), now), (4242, now - 60)]):
+        server.stats[slot * FIELDS + PID] = pid
+        server.stats[slot * FIELDS + HEARTBEAT] = heartbeat
+        server.pids[pid] = slot
+    metrics = server.worker_metrics()
+    assert metrics[0]["healthy"] and metrics[0]["rss_bytes"] > 0, (
+        "Live worker should be healthy with RSS reported"
+    )
+    assert not metrics[1]["healthy"], "Stalled worker should be unhealthy"
+    with patch("codeforge.serve.os.kill") as kill:
+        server._supervise()
+    kill.assert_called_once()
+    assert kill.call_args.args[0] == 4242, "Only the stalled worker should be killed"
+
+
+def test_respawned_worker_not_killed_before_first_heartbeat() -> None:
+    """Test respawn grace; real-world: --max-jobs recycle reaped and respawned in one tick."""
+    server = PreforkServer(workers=1, heartbeat_timeout=5.0)
+    with (
+        patch("codeforge.serve.os.fork", return_value=4243),
+        patch("codeforge.serve.os.kill") as kill,
+    ):
+        server.spawn(0)
+        server._supervise()
+    kill.assert_not_called()
+    assert server.worker_metrics()[0]["healthy"], (
+        "Expected a just-forked worker to count as healthy"
+    )
+
+
+def test_idle_metrics_client_does_not_block_supervisor() -> None:
+    """Test metrics socket timeout; real-world: load balancer opens a probe and stalls."""
+    server = PreforkServer(workers=1, metrics_port=0)
+    http = server._metrics_server()
+    try:
+        with socket.create_connection(http.server_address):  # Sends nothing
+            start = time.monotonic()
+            http.handle_request()
+            assert time.monotonic() - start < 2.0, "Expected stalled client dropped"
+    finally:
+        http.server_close()
+
+
+def test_reap_requeues_jobs_of_dead_worker() -> None:
+    """Test in-flight jobs survive a crash; real-world: worker OOM-killed mid-workflow."""
+    jobs = [{"id": "a", "input": "Build API"}, {"id": "b", "input": "Add auth"}]
+    fake = FakeRedis([*jobs, {"id": "c", "input": "Add tests"}])
+    for _ in jobs:  # Taken by worker 1 before it died
+        fake.lmove(QUEUE_KEY, PROCESSING_KEY.format(1))
+    server = PreforkServer(workers=2)
+    server.pids[4242] = 1
+    respawned: list[list[str]] = []
+    with (
+        patch("redis.Redis", return_value=fake),
+        patch("codeforge.serve.os.waitpid", side_effect=[(4242, 9), (0, 0)]),
+        patch.object(
+            server,
+            "spawn",
+            side_effect=lambda slot: respawned.append(list(fake.lists[QUEUE_KEY])),
+        ),
+    ):
+        server._reap()
+    queued = [json.loads(raw)["id"] for raw in fake.lists[QUEUE_KEY]]
+    assert queued == ["a", "b", "c"], "Unanswered jobs should be first in line again"
+    assert fake.lists[PROCESSING_KEY.format(1)] == [], "Processing list should drain"
+    assert len(respawned) == 1 and len(respawned[0]) == 3, (
+        "Jobs should be requeued before the replacement worker starts"
+    )
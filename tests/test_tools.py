@@ -5,12 +5,15 @@ This module contains unit and integration tests for GraphRAG+ functionality.
 """
 
 from typing import Any
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from codeforge.config import settings
-from codeforge.tools import graphrag_plus
+from codeforge.resilience import CircuitBreaker
+from codeforge.retrieval_cache import RetrievalCache
+from codeforge.tools import RESULT_LIMIT, graphrag_plus
+from codeforge.vector_store import QdrantVectorStore
 
 
 @pytest.mark.asyncio
@@ -98,3 +101,126 @@ async def test_graphrag_plus_no_web() -> None:
         assert len(results) == 2, "Expected vector + graph fuse without web"
         assert "supervised" in str(results[0]), "Expected real-world ML insight"
         mock_tavily.assert_not_called()  # Coverage: No trigger
+
+
+@pytest.mark.asyncio
+async def test_graphrag_plus_qdrant_hits_seed_expansion() -> None:
+    """Test Qdrant hits seed graph expansion that survives the result cap;
+    real-world: 'jwt refresh tokens' hit linked to its auth module node."""
+    client = MagicMock()
+    client.query.return_value = [
+        MagicMock(
+            id=i,
+            score=0.9 - i / 10,
+            payload={"content": f"jwt {i}", "node_id": f"4:v:{i}"},
+        )
+        for i in range(5)
+    ]
+    text_hits = [
+        {"n": {"content": f"token note {i}"}, "node_id": None} for i in range(6)
+    ]
+    neighbors = [{"node_id": "4:m:auth", "n": {"content": "auth module"}, "hops": 1}]
+    with (
+        patch("codeforge.tools.vector_store", QdrantVectorStore(client)),
+        patch(
+            "codeforge.tools.run_query", new_callable=AsyncMock, return_value=text_hits
+        ),
+        patch(
+            "codeforge.tools.graph_cache.expand",
+            new_callable=AsyncMock,
+            return_value=neighbors,
+        ) as mock_expand,
+        patch.object(settings, "use_async", False),
+        patch.object(settings, "use_sparse", False),
+    ):
+        results: list[dict[str, Any]] = await graphrag_plus(
+            "jwt refresh tokens", hops=1
+        )
+    _, seeds, hops, max_nodes = mock_expand.call_args.args
+    assert seeds == [f"4:v:{i}" for i in range(5)], (
+        "Expected vector hits to seed expansion"
+    )
+    assert max_nodes == 3, "Expected expansion capped to its reserved slots"
+    assert len(results) == RESULT_LIMIT and results[-1]["node_id"] == "4:m:auth", (
+        "Expected expanded node kept despite 11 direct hits"
+    )
+    assert results[0] == {
+        "id": 0,
+        "score": 0.9,
+        "content": "jwt 0",
+        "node_id": "4:v:0",
+    }, "Expected Qdrant points flattened to hit dicts"
+
+
+class FakeNeo4jDriver:
+    """Sync driver stand-in recording Cypher and parameters per session.run."""
+
+    def __init__(self, records: list[dict[str, Any]], error: Exception | None = None):
+        self.records = records
+        self.error = error
+        self.calls: list[tuple[str, dict[str, Any]]] = []
+
+    def session(self) -> "FakeNeo4jDriver":
+        return self
+
+    def __enter__(self) -> "FakeNeo4jDriver":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def run(self, cypher: str, parameters: dict[str, Any]) -> MagicMock:
+        self.calls.append((cypher, parameters))
+        if self.error is not None:
+            raise self.error
+        return MagicMock(data=MagicMock(return_value=self.records))
+
+
+class FakeVectorStore:
+    def __init__(self, hits: list[dict[str, Any]]) -> None:
+        self.hits = hits
+
+    async def search(self, vector: list[float], **kwargs: Any) -> list[dict[str, Any]]:
+        return self.hits
+
+
+@pytest.mark.asyncio
+async def test_graphrag_plus_text_match_through_driver() -> None:
+    """Test the real run_query path and caching; real-world: 'refresh token rotation' note."""
+    driver = FakeNeo4jDriver(
+        [{"n": {"content": "Rotate refresh tokens"}, "node_id": None}]
+    )
+    hits = [{"id": 1, "score": 0.8, "content": "JWT refresh"}]
+    with (
+        patch("codeforge.tools.vector_store", FakeVectorStore(hits)),
+        patch("codeforge.tools.neo4j_driver", driver),
+        patch("codeforge.tools.retrieval_cache", RetrievalCache()),
+        patch.dict("codeforge.resilience.breakers", {"neo4j": CircuitBreaker("neo4j")}),
+        patch.object(settings, "use_sparse", False),
+    ):
+        first = await graphrag_plus("refresh token rotation", hops=0)
+        second = await graphrag_plus("refresh token rotation", hops=0)
+    assert driver.calls == [
+        (driver.calls[0][0], {"query": "refresh token rotation"})
+    ], "Expected one text-match query with its parameter, then a cache hit"
+    assert first == second and len(first) == 2, "Expected vector + graph hits cached"
+
+
+@pytest.mark.asyncio
+async def test_graphrag_plus_degrades_when_neo4j_down() -> None:
+    """Test degraded retrieval; real-world: Neo4j refusing connections during failover."""
+    driver = FakeNeo4jDriver([], error=ConnectionError("bolt refused"))
+    hits = [{"id": 1, "score": 0.8, "content": "ML basics"}]
+    cache = RetrievalCache()
+    with (
+        patch("codeforge.tools.vector_store", FakeVectorStore(hits)),
+        patch("codeforge.tools.neo4j_driver", driver),
+        patch("codeforge.tools.retrieval_cache", cache),
+        patch.dict("codeforge.resilience.breakers", {"neo4j": CircuitBreaker("neo4j")}),
+        patch.object(settings, "use_sparse", False),
+    ):
+        results = await graphrag_plus("machine learning failover", hops=0)
+    assert results == hits, "Expected vector hits despite the graph outage"
+    assert cache.get("machine learning failover", ("general", 0)) is None, (
+        "Expected degraded results not cached"
+    )
@@ -0,0 +1,124 @@
+# coding=utf-8
+"""Tests for vector-store backends in CodeForge AI.
+
+This module contains tests for the embedded memory-mapped vector store.
+"""
+
+import asyncio
+import multiprocessing
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from codeforge.vector_store import LocalVectorStore, hnswlib
+
+
+@pytest.mark.asyncio
+async def test_local_store_exact_search(tmp_path: Path) -> None:
+    """Test exact cosine search; real-world: nearest code snippet to 'add' query."""
+    store = LocalVectorStore(tmp_path, block_rows=2)
+    await store.upsert(
+        [
+            {"id": "add", "vector": [1.0, 0.0, 0.0], "payload": {"content": "def add"}},
+            {"id": "sub", "vector": [0.0, 1.0, 0.0], "payload": {"content": "def sub"}},
+            {"id": "mul", "vector": [0.7, 0.7, 0.0], "payload": {"content": "def mul"}},
+        ]
+    )
+    results: list[dict[str, Any]] = await store.search([0.9, 0.1, 0.0], limit=2)
+    assert [r["id"] for r in results] == ["add", "mul"], (
+        "Expected hits ranked by cosine across blocks"
+    )  # Insight: Blocked top-k merge
+    assert results[0]["content"] == "def add", "Expected payload merged into hit"
+    truncated = await store.search([0.0, 1.0], limit=1)
+    assert truncated[0]["id"] == "sub", "Expected prefix search for truncated dims"
+
+
+@pytest.mark.asyncio
+async def test_local_store_persist_and_replace(tmp_path: Path) -> None:
+    """Test persistence across instances with id replacement; real-world: re-indexed web result."""
+    writer = LocalVectorStore(tmp_path)
+    reader = LocalVectorStore(tmp_path)
+    await writer.upsert(
+        [{"id": "web1", "vector": [1.0, 0.0], "payload": {"content": "old"}}]
+    )
+    await writer.upsert(
+        [{"id": "web1", "vector": [0.0, 1.0], "payload": {"content": "new"}}]
+    )
+    results = await reader.search([0.0, 1.0], limit=5)
+    assert len(results) == 1, "Expected replaced id to be masked"
+    assert results[0]["content"] == "new", (
+        "Expected concurrent reader to see latest row"
+    )
+    assert isinstance(reader._snapshot.matrix, np.memmap), "Expected zero-copy mapping"
+    writer.compact()
+    reopened = LocalVectorStore(tmp_path)
+    assert len(reopened) == 1, "Expected compacted store to reload from disk"
+    assert (await reopened.search([0.0, 1.0]))[0]["content"] == "new"
+
+
+@pytest.mark.asyncio
+async def test_local_store_dimension_mismatch(tmp_path: Path) -> None:
+    """Test rejected upsert on wrong dimension; real-world: mixing 1024D and 768D embeddings."""
+    store = LocalVectorStore(tmp_path)
+    await store.upsert([{"id": "a", "vector": [1.0, 0.0, 0.0]}])
+    with pytest.raises(ValueError):
+        await store.upsert([{"id": "b", "vector": [1.0, 0.0]}])
+    assert await store.search([1.0, 0.0, 0.0], limit=0) == [], (
+        "Expected no hits for zero limit"
+    )
+
+
+@pytest.mark.asyncio
+async def test_local_store_hnsw_on_query_prefix(tmp_path: Path) -> None:
+    """Test HNSW serves truncated queries; real-world: 256D code query on 1024D rows."""
+    pytest.importorskip("hnswlib")
+    store = LocalVectorStore(tmp_path, use_hnsw=True, hnsw_dims=[2])
+    await store.upsert(
+        [
+            {"id": "add", "vector": [1.0, 0.0, 0.5], "payload": {"content": "def add"}},
+            {"id": "sub", "vector": [0.0, 1.0, 0.5], "payload": {"content": "def sub"}},
+        ]
+    )
+    assert set(store._hnsw) == {2}, "Expected the index built over the query prefix"
+    with patch.object(store, "search_batch", side_effect=AssertionError("scan")):
+        results = await store.search([0.1, 0.9], limit=1)
+    assert results[0]["id"] == "sub", "Expected prefix query answered by HNSW"
+    assert (await store.search([0.1, 0.9, 0.0], limit=1))[0]["id"] == "sub", (
+        "Expected unindexed dimensions to fall back to the exact scan"
+    )
+
+
+def _upsert_batch(path: str, prefix: str) -> None:
+    store = LocalVectorStore(path)
+    for i in range(20):
+        vector = [1.0, float(i), 0.5]
+        asyncio.run(store.upsert([{"id": f"{prefix}{i}", "vector": vector}]))
+
+
+@pytest.mark.asyncio
+async def test_local_store_concurrent_writers(tmp_path: Path) -> None:
+    """Test cross-process and search/upsert safety; real-world: serve workers ingesting web hits."""
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_upsert_batch, args=(str(tmp_path), p)) for p in "ab"
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+    assert len(LocalVectorStore(tmp_path)) == 40, "Expected no rows lost to a race"
+
+    store = LocalVectorStore(tmp_path, use_hnsw=hnswlib is not None)
+    writer = asyncio.create_task(_upsert_many(store))
+    while not writer.done():
+        hits = await store.search([0.0, 1.0, 0.5], limit=5)
+        assert all(h["id"] is not None for h in hits)
+    await writer
+
+
+async def _upsert_many(store: LocalVectorStore) -> None:
+    for i in range(50):
+        await store.upsert([{"id": f"c{i}", "vector": [0.1, float(i), 1.0]}])